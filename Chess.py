@@ -1,6 +1,12 @@
-import numpy as np
+import random
+import time
+from array import array
 from enum import Enum, auto
-import copy
+from chess_logging import get_logger
+from chess_profile import SearchProfiler, profiler_from_env
+
+logger = get_logger("engine")
+ai_logger = get_logger("ai")
 
 class PieceType(Enum):
     EMPTY = auto()
@@ -17,42 +23,296 @@ class Color(Enum):
     BLACK = auto()
 
 class Piece:
-    def __init__(self, piece_type=PieceType.EMPTY, color=Color.NONE):
-        self.piece_type = piece_type
-        self.color = color
-        self.has_moved = False
+    """
+    Immutable piece shared by every square holding the same type and color.
+    Piece(piece_type, color) returns the cached instance instead of allocating,
+    so moving pieces around the board never creates new objects.
+    """
+    __slots__ = ("piece_type", "color", "code", "symbol")
+    _instances = {}
+    
+    def __new__(cls, piece_type=PieceType.EMPTY, color=Color.NONE):
+        if piece_type == PieceType.EMPTY:
+            color = Color.NONE
+        return cls._instances[(piece_type, color)]
+    
+    @classmethod
+    def _create(cls, piece_type, color, symbol):
+        piece = object.__new__(cls)
+        object.__setattr__(piece, "piece_type", piece_type)
+        object.__setattr__(piece, "color", color)
+        # Small integer code: 0 for empty, +1..+6 for white and -1..-6 for black (pawn..king)
+        code = piece_type.value - PieceType.EMPTY.value
+        object.__setattr__(piece, "code", -code if color == Color.BLACK else code)
+        object.__setattr__(piece, "symbol", symbol)
+        cls._instances[(piece_type, color)] = piece
+        return piece
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece instances are immutable")
     
     def __str__(self):
-        if self.piece_type == PieceType.EMPTY:
-            return "."
-        
-        symbol = {
-            PieceType.PAWN: "P",
-            PieceType.KNIGHT: "N",
-            PieceType.BISHOP: "B",
-            PieceType.ROOK: "R",
-            PieceType.QUEEN: "Q",
-            PieceType.KING: "K"
-        }[self.piece_type]
-        
-        return symbol if self.color == Color.WHITE else symbol.lower()
+        return self.symbol
+    
+    def __repr__(self):
+        return f"Piece({self.piece_type.name}, {self.color.name})"
+    
+    def __reduce__(self):
+        return (Piece, (self.piece_type, self.color))
     
     def copy(self):
-        new_piece = Piece(self.piece_type, self.color)
-        new_piece.has_moved = self.has_moved
-        return new_piece
+        # Pieces are shared and immutable, so a copy is the piece itself
+        return self
+
+Piece._create(PieceType.EMPTY, Color.NONE, ".")
+for _piece_type, _symbol in ((PieceType.PAWN, "P"), (PieceType.KNIGHT, "N"), (PieceType.BISHOP, "B"),
+                             (PieceType.ROOK, "R"), (PieceType.QUEEN, "Q"), (PieceType.KING, "K")):
+    Piece._create(_piece_type, Color.WHITE, _symbol)
+    Piece._create(_piece_type, Color.BLACK, _symbol.lower())
+
+EMPTY_SQUARE = Piece()
+
+# FEN piece letters mapped to their flyweights
+FEN_PIECES = {str(piece): piece for piece in Piece._instances.values() if piece is not EMPTY_SQUARE}
+
+# Castling rights are kept per position as bits instead of per-piece has_moved flags
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING_RIGHTS = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+# Rights lost when a move starts or ends on one of these squares
+CASTLING_RIGHTS_LOST = {
+    (7, 4): WHITE_KINGSIDE | WHITE_QUEENSIDE,
+    (7, 7): WHITE_KINGSIDE,
+    (7, 0): WHITE_QUEENSIDE,
+    (0, 4): BLACK_KINGSIDE | BLACK_QUEENSIDE,
+    (0, 7): BLACK_KINGSIDE,
+    (0, 0): BLACK_QUEENSIDE,
+}
+
+# One shared (row, col) tuple per square. Move generation hands these out
+# instead of building new tuples, so cached move lists of many live games
+# do not each hold their own copies.
+SQUARES = tuple(tuple((row, col) for col in range(8)) for row in range(8))
+
+def _targets(row, col, offsets):
+    return tuple(SQUARES[row + row_offset][col + col_offset] for row_offset, col_offset in offsets
+                 if 0 <= row + row_offset < 8 and 0 <= col + col_offset < 8)
+
+def _rays(row, col, directions):
+    rays = []
+    for direction_row, direction_col in directions:
+        ray = tuple(SQUARES[row + direction_row * distance][col + direction_col * distance] for distance in range(1, 8)
+                    if 0 <= row + direction_row * distance < 8 and 0 <= col + direction_col * distance < 8)
+        if ray:
+            rays.append(ray)
+    return tuple(rays)
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+DIAGONAL_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+ORTHOGONAL_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Per-square tables built once at import, indexed [row][col]. Targets are
+# tuples of (row, col); rays list the squares outward from the origin, one
+# tuple per direction, so a scan can stop at the first blocker.
+KNIGHT_TARGETS = [[_targets(row, col, KNIGHT_OFFSETS) for col in range(8)] for row in range(8)]
+KING_TARGETS = [[_targets(row, col, KING_OFFSETS) for col in range(8)] for row in range(8)]
+DIAGONAL_RAYS = [[_rays(row, col, DIAGONAL_DIRECTIONS) for col in range(8)] for row in range(8)]
+ORTHOGONAL_RAYS = [[_rays(row, col, ORTHOGONAL_DIRECTIONS) for col in range(8)] for row in range(8)]
+QUEEN_RAYS = [[DIAGONAL_RAYS[row][col] + ORTHOGONAL_RAYS[row][col] for col in range(8)] for row in range(8)]
+
+# Squares attacked by a pawn of the given color standing on [row][col]. These
+# are also the squares from which an enemy pawn would attack [row][col].
+PAWN_ATTACKS = {
+    Color.WHITE: [[_targets(row, col, ((-1, -1), (-1, 1))) for col in range(8)] for row in range(8)],
+    Color.BLACK: [[_targets(row, col, ((1, -1), (1, 1))) for col in range(8)] for row in range(8)],
+}
+
+# The flyweights of each color, for identity checks in attack detection
+PIECES_BY_COLOR = {
+    color: tuple(Piece(piece_type, color) for piece_type in (PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+                                                              PieceType.ROOK, PieceType.QUEEN, PieceType.KING))
+    for color in (Color.WHITE, Color.BLACK)
+}
+
+# Piece values used by static exchange evaluation unless others are given
+SEE_PIECE_VALUES = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 320,
+    PieceType.BISHOP: 330,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 20000,
+}
+
+# Moves are encoded as 16-bit integers: bits 0-5 hold the from square,
+# bits 6-11 the to square (square = row * 8 + col) and bits 12-15 the flags.
+# Only stored moves (move_history) use this encoding. Move generation, the
+# legal-move cache and the search pass (from_pos, to_pos) tuples of the
+# shared SQUARES entries, which cost no allocation per move.
+MOVE_NORMAL = 0
+MOVE_DOUBLE_PUSH = 1
+MOVE_CASTLE = 2
+MOVE_EN_PASSANT = 3
+MOVE_PROMOTION_KNIGHT = 4
+MOVE_PROMOTION_BISHOP = 5
+MOVE_PROMOTION_ROOK = 6
+MOVE_PROMOTION_QUEEN = 7
+MOVE_MASK = 0xFFFF
+
+PROMOTION_PIECE_TYPES = {
+    MOVE_PROMOTION_KNIGHT: PieceType.KNIGHT,
+    MOVE_PROMOTION_BISHOP: PieceType.BISHOP,
+    MOVE_PROMOTION_ROOK: PieceType.ROOK,
+    MOVE_PROMOTION_QUEEN: PieceType.QUEEN,
+}
+
+def encode_move(from_pos, to_pos, flags=MOVE_NORMAL):
+    return (from_pos[0] * 8 + from_pos[1]) | (to_pos[0] * 8 + to_pos[1]) << 6 | flags << 12
+
+def decode_move(move):
+    """
+    Returns (from_pos, to_pos, flags) for an encoded move.
+    """
+    from_square = move & 0x3F
+    to_square = move >> 6 & 0x3F
+    return SQUARES[from_square >> 3][from_square & 7], SQUARES[to_square >> 3][to_square & 7], move >> 12
+
+def move_to_algebraic(move):
+    from_pos, to_pos, flags = decode_move(move)
+    text = "".join(chr(col + ord('a')) + str(8 - row) for row, col in (from_pos, to_pos))
+    if flags >= MOVE_PROMOTION_KNIGHT:
+        text += "nbrq"[flags - MOVE_PROMOTION_KNIGHT]
+    return text
+
+# move_history holds one 64-bit undo record per move: the 16-bit move, the
+# captured piece's code (+6), the previous en passant square (64 for none), the
+# previous castling rights and the previous halfmove clock
+HISTORY_TYPECODE = "Q"
+NO_SQUARE = 64
+PIECES_BY_CODE = [None] * 13
+for _piece in Piece._instances.values():
+    PIECES_BY_CODE[_piece.code + 6] = _piece
+
+def pack_undo_record(move, captured, en_passant_target, castling_rights, halfmove_clock):
+    en_passant = NO_SQUARE if en_passant_target is None else en_passant_target[0] * 8 + en_passant_target[1]
+    return (move | (captured.code + 6) << 16 | en_passant << 20 | castling_rights << 27 |
+            min(halfmove_clock, 0xFFFF) << 31)
+
+def unpack_undo_record(record):
+    """
+    Returns (move, captured piece, previous en passant target, previous castling
+    rights, previous halfmove clock).
+    """
+    en_passant = record >> 20 & 0x7F
+    return (record & MOVE_MASK, PIECES_BY_CODE[record >> 16 & 0xF],
+            None if en_passant == NO_SQUARE else SQUARES[en_passant >> 3][en_passant & 7],
+            record >> 27 & 0xF, record >> 31 & 0xFFFF)
+
+# Zobrist keys for position hashing, indexed [code + 6][square]. Empty squares
+# hash to 0 so that replacing one piece by another is a pair of XORs.
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[0] * 64 if code == 0 else [_zobrist_random.getrandbits(64) for _ in range(64)]
+                  for code in range(-6, 7)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]
+
+def en_passant_key(board, en_passant_target):
+    """
+    Zobrist key of an en passant target. It only counts when a pawn of the side
+    to move stands beside the pawn that moved two squares; otherwise the
+    position is the same as one without the target, as repetition rules require.
+    """
+    if en_passant_target is None:
+        return 0
+    row, col = en_passant_target
+    # White pawns skipping row 5 stand on row 4 and are captured by black pawns (code -1)
+    pawn_row, capturer = (4, -1) if row == 5 else (3, 1)
+    pawns = board[pawn_row]
+    if (col > 0 and pawns[col - 1].code == capturer) or (col < 7 and pawns[col + 1].code == capturer):
+        return ZOBRIST_EN_PASSANT[col]
+    return 0
+
+# Halfmoves without a capture or pawn move after which the game is drawn
+FIFTY_MOVE_HALFMOVES = 100
 
 class ChessGame:
+    # No per-instance __dict__: keeps each live game small when a process holds many
+    __slots__ = ("board", "current_player", "move_history", "en_passant_target", "castling_rights",
+                 "white_king_pos", "black_king_pos", "game_over", "winner", "hash", "halfmove_clock",
+                 "position_history", "position_counts", "_legal_moves")
+    
     def __init__(self):
-        self.board = np.array([[Piece() for _ in range(8)] for _ in range(8)])
+        # A list of 8 rows of pieces; indexing plain lists is faster than a NumPy object array
+        self.board = [[EMPTY_SQUARE] * 8 for _ in range(8)]
         self.current_player = Color.WHITE
-        self.move_history = []
+        # Packed undo records, see pack_undo_record
+        self.move_history = array(HISTORY_TYPECODE)
         self.initialize_board()
         self.en_passant_target = None
+        self.castling_rights = ALL_CASTLING_RIGHTS
         self.white_king_pos = (7, 4)
         self.black_king_pos = (0, 4)
         self.game_over = False
         self.winner = None
+        self.reset_position_history()
+    
+    def compute_hash(self):
+        """
+        Computes the Zobrist key of the current position from scratch.
+        """
+        key = 0
+        for row in range(8):
+            for col in range(8):
+                key ^= ZOBRIST_PIECES[self.board[row][col].code + 6][row * 8 + col]
+        if self.current_player == Color.BLACK:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        key ^= ZOBRIST_CASTLING[self.castling_rights]
+        key ^= en_passant_key(self.board, self.en_passant_target)
+        return key
+    
+    def reset_position_history(self, halfmove_clock=0):
+        """
+        Starts repetition tracking from the current position.
+        position_counts counts how often each position key occurred in the
+        game, so repetitions are found in O(1). Positions from before the last
+        capture or pawn move (the halfmove clock boundary) can never recur.
+        """
+        self.hash = self.compute_hash()
+        self.halfmove_clock = halfmove_clock
+        self.position_history = array(HISTORY_TYPECODE)  # keys of the positions before the current one
+        self.position_counts = {self.hash: 1}
+        self.invalidate_move_cache()
+    
+    def invalidate_move_cache(self):
+        """
+        Drops the cached legal moves. make_move, undo_move and the null-move
+        methods do this themselves; call it after editing the board directly.
+        """
+        self._legal_moves = None
+    
+    def get_legal_moves(self):
+        """
+        Returns the legal moves of the side to move as a dict from each piece's
+        position to its target squares, computed once per position and shared by
+        move selection, move validation and end-of-game detection.
+        Do not modify the returned dict or lists.
+        """
+        if self._legal_moves is None:
+            legal_moves = {}
+            color = self.current_player
+            for row in range(8):
+                for col in range(8):
+                    if self.board[row][col].color == color:
+                        moves = self.generate_valid_moves(SQUARES[row][col])
+                        if moves:
+                            legal_moves[SQUARES[row][col]] = moves
+            self._legal_moves = legal_moves
+        return self._legal_moves
     
     def initialize_board(self):
         # Set up the pawns
@@ -68,6 +328,58 @@ class ChessGame:
             self.board[0][col] = Piece(back_row[col], Color.BLACK)
             self.board[7][col] = Piece(back_row[col], Color.WHITE)
     
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Creates a game from a FEN string. The move counters are optional.
+        Raises ValueError if the FEN is malformed.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        placement, side, castling, en_passant = fields[:4]
+        
+        game = cls()
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"Invalid FEN placement: {placement!r}")
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    for _ in range(int(char)):
+                        if col < 8:
+                            game.board[row][col] = EMPTY_SQUARE
+                        col += 1
+                elif char in FEN_PIECES and col < 8:
+                    game.board[row][col] = FEN_PIECES[char]
+                    if char == "K":
+                        game.white_king_pos = SQUARES[row][col]
+                    elif char == "k":
+                        game.black_king_pos = SQUARES[row][col]
+                    col += 1
+                else:
+                    raise ValueError(f"Invalid FEN rank: {rank!r}")
+            if col != 8:
+                raise ValueError(f"Invalid FEN rank: {rank!r}")
+        
+        if side not in ("w", "b"):
+            raise ValueError(f"Invalid FEN side to move: {side!r}")
+        game.current_player = Color.WHITE if side == "w" else Color.BLACK
+        
+        game.castling_rights = 0
+        for char, right in (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE),
+                            ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE)):
+            if char in castling:
+                game.castling_rights |= right
+        
+        game.en_passant_target = None if en_passant == "-" else game.algebraic_to_coords(en_passant)
+        
+        halfmove_clock = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+        game.reset_position_history(halfmove_clock)
+        game.check_game_end()
+        return game
+    
  #   def print_board(self):
  #       print("  a b c d e f g h")
  #       print(" +-----------------+")
@@ -85,13 +397,96 @@ class ChessGame:
         col = ord(algebraic[0].lower()) - ord('a')
         row = 8 - int(algebraic[1])
         if 0 <= row < 8 and 0 <= col < 8:
-            return (row, col)
+            return SQUARES[row][col]
         return None
     
     def coords_to_algebraic(self, coords):
         row, col = coords
         return chr(col + ord('a')) + str(8 - row)
     
+    def parse_move(self, text):
+        """
+        Parses a move in coordinate notation ("e2e4", "e7e8q") into (from_pos, to_pos).
+        Returns None if the text is not a move on the board. A promotion suffix
+        is accepted, but pawns always promote to a queen.
+        """
+        if len(text) not in (4, 5) or not (text[1].isdigit() and text[3].isdigit()):
+            return None
+        from_pos = self.algebraic_to_coords(text[:2])
+        to_pos = self.algebraic_to_coords(text[2:4])
+        if from_pos is None or to_pos is None:
+            return None
+        return from_pos, to_pos
+    
+    def to_fen(self):
+        """
+        Returns the position as a FEN string. The move number counts from the
+        start of the recorded history.
+        """
+        ranks = []
+        for row in range(8):
+            rank = ""
+            empty = 0
+            for piece in self.board[row]:
+                if piece is EMPTY_SQUARE:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += str(piece)
+            ranks.append(rank + (str(empty) if empty else ""))
+        
+        castling = "".join(char for char, right in (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE),
+                                                    ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE))
+                           if self.castling_rights & right) or "-"
+        en_passant = "-" if self.en_passant_target is None else self.coords_to_algebraic(self.en_passant_target)
+        side = "w" if self.current_player == Color.WHITE else "b"
+        return f"{'/'.join(ranks)} {side} {castling} {en_passant} {self.halfmove_clock} {1 + len(self.move_history) // 2}"
+    
+    def move_to_san(self, from_pos, to_pos):
+        """
+        Returns a legal move of the side to move in standard algebraic notation,
+        e.g. "Nbd7", "exd5", "O-O", "e8=Q+", "Qh7#". Pawns promote to a queen.
+        """
+        from_row, from_col = from_pos
+        to_row, to_col = to_pos
+        piece = self.board[from_row][from_col]
+        target = self.board[to_row][to_col]
+        
+        if piece.piece_type == PieceType.KING and abs(to_col - from_col) == 2:
+            san = "O-O" if to_col > from_col else "O-O-O"
+        elif piece.piece_type == PieceType.PAWN:
+            san = self.coords_to_algebraic(to_pos)
+            if to_col != from_col:
+                # Pawn captures, en passant included, name the file they come from
+                san = self.coords_to_algebraic(from_pos)[0] + "x" + san
+            if to_row == 0 or to_row == 7:
+                san += "=Q"
+        else:
+            # Name the file, rank or both if another piece of the same kind can reach the square
+            rivals = [position for position, moves in self.get_legal_moves().items()
+                      if position != from_pos and self.board[position[0]][position[1]] is piece and to_pos in moves]
+            origin = self.coords_to_algebraic(from_pos)
+            if not rivals:
+                disambiguation = ""
+            elif all(col != from_col for _, col in rivals):
+                disambiguation = origin[0]
+            elif all(row != from_row for row, _ in rivals):
+                disambiguation = origin[1]
+            else:
+                disambiguation = origin
+            capture = "x" if target is not EMPTY_SQUARE else ""
+            san = str(piece).upper() + disambiguation + capture + self.coords_to_algebraic(to_pos)
+        
+        self.make_move(from_pos, to_pos, skip_validation=True)
+        if self.is_checkmate(self.current_player):
+            san += "#"
+        elif self.is_check(self.current_player):
+            san += "+"
+        self.undo_move()
+        return san
+    
     def make_move(self, from_pos, to_pos, skip_validation=False):
         from_row, from_col = from_pos
         to_row, to_col = to_pos
@@ -101,40 +496,64 @@ class ChessGame:
         
         # Check that the piece exists and belongs to the current player
         if piece.piece_type == PieceType.EMPTY:
-            print(f"No piece at {from_pos}")
+            logger.debug("No piece at %s", from_pos)
             return False
         if piece.color != self.current_player:
-            print(f"Not your turn. Current player: {self.current_player}, Piece color: {piece.color}")
+            logger.debug("Not your turn. Current player: %s, Piece color: %s", self.current_player, piece.color)
             return False
         
         # Always validate unless explicitly told to skip
         if not skip_validation and not self.is_valid_move(from_pos, to_pos):
-            print(f"Invalid move: {from_pos} to {to_pos}")
+            logger.debug("Invalid move: %s to %s", from_pos, to_pos)
             return False
         
-        # Store the move
-        self.move_history.append((from_pos, to_pos, self.board[to_row][to_col].copy(), self.en_passant_target))
+        captured = self.board[to_row][to_col]
+        
+        # Classify the move
+        flags = MOVE_NORMAL
+        if piece.piece_type == PieceType.PAWN:
+            if to_row == 0 or to_row == 7:
+                # Auto-promote to queen for now
+                flags = MOVE_PROMOTION_QUEEN
+            elif abs(to_row - from_row) == 2:
+                flags = MOVE_DOUBLE_PUSH
+            elif to_col != from_col and captured.piece_type == PieceType.EMPTY and self.en_passant_target == to_pos:
+                flags = MOVE_EN_PASSANT
+        elif piece.piece_type == PieceType.KING and abs(to_col - from_col) == 2:
+            flags = MOVE_CASTLE
+        
+        # Store the move along with everything needed to undo it
+        self.move_history.append(pack_undo_record(encode_move(from_pos, to_pos, flags), captured,
+                                                  self.en_passant_target, self.castling_rights,
+                                                  self.halfmove_clock))
+        self.position_history.append(self.hash)
+        
+        # The position key is updated alongside every change below
+        key = self.hash ^ ZOBRIST_BLACK_TO_MOVE ^ ZOBRIST_CASTLING[self.castling_rights]
+        if self.en_passant_target is not None:
+            key ^= en_passant_key(self.board, self.en_passant_target)
+        
+        # Captures and pawn moves reset the fifty-move count
+        if piece.piece_type == PieceType.PAWN or captured.piece_type != PieceType.EMPTY:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
         
         # Handle en passant capture
-        en_passant_capture = False
-        if piece.piece_type == PieceType.PAWN and (to_col != from_col) and self.board[to_row][to_col].piece_type == PieceType.EMPTY:
-            if self.en_passant_target == to_pos:
-                # Capture the pawn that just moved two squares
-                if piece.color == Color.WHITE:
-                    self.board[to_row + 1][to_col] = Piece()
-                else:
-                    self.board[to_row - 1][to_col] = Piece()
-                en_passant_capture = True
+        if flags == MOVE_EN_PASSANT:
+            # Capture the pawn that just moved two squares
+            key ^= ZOBRIST_PIECES[self.board[from_row][to_col].code + 6][from_row * 8 + to_col]
+            self.board[from_row][to_col] = EMPTY_SQUARE
         
         # Update en passant target
         self.en_passant_target = None
-        if piece.piece_type == PieceType.PAWN and abs(to_row - from_row) == 2:
+        if flags == MOVE_DOUBLE_PUSH:
             # Set the en passant target to the square the pawn skipped
             middle_row = (from_row + to_row) // 2
-            self.en_passant_target = (middle_row, from_col)
+            self.en_passant_target = SQUARES[middle_row][from_col]
         
         # Handle castling
-        if piece.piece_type == PieceType.KING and abs(to_col - from_col) == 2:
+        if flags == MOVE_CASTLE:
             # Determine rook positions based on castling side
             if to_col > from_col:  # Kingside
                 rook_from = (from_row, 7)
@@ -144,31 +563,47 @@ class ChessGame:
                 rook_to = (from_row, to_col + 1)
             
             # Move the rook
-            self.board[rook_to[0]][rook_to[1]] = self.board[rook_from[0]][rook_from[1]]
-            self.board[rook_from[0]][rook_from[1]] = Piece()
-            self.board[rook_to[0]][rook_to[1]].has_moved = True
+            rook = self.board[rook_from[0]][rook_from[1]]
+            key ^= (ZOBRIST_PIECES[rook.code + 6][rook_from[0] * 8 + rook_from[1]] ^
+                    ZOBRIST_PIECES[rook.code + 6][rook_to[0] * 8 + rook_to[1]])
+            self.board[rook_to[0]][rook_to[1]] = rook
+            self.board[rook_from[0]][rook_from[1]] = EMPTY_SQUARE
+        
+        # Moving the king or a rook, or capturing a rook, gives up castling rights
+        if from_pos in CASTLING_RIGHTS_LOST:
+            self.castling_rights &= ~CASTLING_RIGHTS_LOST[from_pos]
+        if to_pos in CASTLING_RIGHTS_LOST:
+            self.castling_rights &= ~CASTLING_RIGHTS_LOST[to_pos]
         
         # Update king position
         if piece.piece_type == PieceType.KING:
             if piece.color == Color.WHITE:
-                self.white_king_pos = to_pos
+                self.white_king_pos = SQUARES[to_row][to_col]
             else:
-                self.black_king_pos = to_pos
+                self.black_king_pos = SQUARES[to_row][to_col]
         
         # Move the piece
         self.board[to_row][to_col] = piece
-        self.board[from_row][from_col] = Piece()
-        piece.has_moved = True
+        self.board[from_row][from_col] = EMPTY_SQUARE
         
         # Handle pawn promotion
-        if piece.piece_type == PieceType.PAWN and (to_row == 0 or to_row == 7):
-            # Auto-promote to queen for now
-            self.board[to_row][to_col] = Piece(PieceType.QUEEN, piece.color)
+        if flags >= MOVE_PROMOTION_KNIGHT:
+            self.board[to_row][to_col] = Piece(PROMOTION_PIECE_TYPES[flags], piece.color)
+        
+        key ^= (ZOBRIST_PIECES[piece.code + 6][from_row * 8 + from_col] ^
+                ZOBRIST_PIECES[captured.code + 6][to_row * 8 + to_col] ^
+                ZOBRIST_PIECES[self.board[to_row][to_col].code + 6][to_row * 8 + to_col] ^
+                ZOBRIST_CASTLING[self.castling_rights])
+        if self.en_passant_target is not None:
+            key ^= en_passant_key(self.board, self.en_passant_target)
+        self.hash = key
+        self.position_counts[key] = self.position_counts.get(key, 0) + 1
         
         # Switch player
         self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+        self._legal_moves = None
         
-        # Check for checkmate or stalemate
+        # Check for checkmate, stalemate or a draw by rule
         self.check_game_end()
         
         return True
@@ -177,15 +612,23 @@ class ChessGame:
         if not self.move_history:
             return False
         
-        from_pos, to_pos, captured_piece, prev_en_passant = self.move_history.pop()
+        (move, captured_piece, prev_en_passant, prev_castling_rights,
+         prev_halfmove_clock) = unpack_undo_record(self.move_history.pop())
+        from_pos, to_pos, flags = decode_move(move)
         from_row, from_col = from_pos
         to_row, to_col = to_pos
         
-        # Get the piece being moved back
-        piece = self.board[to_row][to_col]
+        # Switch player back
+        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+        
+        # Get the piece being moved back (a promoted piece goes back as a pawn)
+        if flags >= MOVE_PROMOTION_KNIGHT:
+            piece = Piece(PieceType.PAWN, self.current_player)
+        else:
+            piece = self.board[to_row][to_col]
         
         # Handle castling
-        if piece.piece_type == PieceType.KING and abs(to_col - from_col) == 2:
+        if flags == MOVE_CASTLE:
             # Determine rook positions based on castling side
             if to_col > from_col:  # Kingside
                 rook_from = (from_row, to_col - 1)
@@ -196,18 +639,12 @@ class ChessGame:
             
             # Move the rook back
             self.board[rook_to[0]][rook_to[1]] = self.board[rook_from[0]][rook_from[1]]
-            self.board[rook_from[0]][rook_from[1]] = Piece()
-            self.board[rook_to[0]][rook_to[1]].has_moved = False
+            self.board[rook_from[0]][rook_from[1]] = EMPTY_SQUARE
         
-        # Handle en passant
-        if piece.piece_type == PieceType.PAWN and (to_col != from_col) and captured_piece.piece_type == PieceType.EMPTY:
-            # This was an en passant capture, restore the captured pawn
-            if piece.color == Color.WHITE:
-                self.board[to_row + 1][to_col] = Piece(PieceType.PAWN, Color.BLACK)
-                self.board[to_row + 1][to_col].has_moved = True
-            else:
-                self.board[to_row - 1][to_col] = Piece(PieceType.PAWN, Color.WHITE)
-                self.board[to_row - 1][to_col].has_moved = True
+        # Handle en passant, restoring the captured pawn
+        if flags == MOVE_EN_PASSANT:
+            opponent_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
+            self.board[from_row][to_col] = Piece(PieceType.PAWN, opponent_color)
         
         # Move the piece back
         self.board[from_row][from_col] = piece
@@ -220,15 +657,17 @@ class ChessGame:
             else:
                 self.black_king_pos = from_pos
         
-        # Reset has_moved flag if this was the piece's first move
-        if len(self.move_history) == 0 or self.move_history[-1][0] != from_pos:
-            piece.has_moved = False
-        
-        # Restore en passant target
+        # Restore en passant target, castling rights and the position key
         self.en_passant_target = prev_en_passant
-        
-        # Switch player back
-        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+        self.castling_rights = prev_castling_rights
+        self.halfmove_clock = prev_halfmove_clock
+        count = self.position_counts[self.hash] - 1
+        if count:
+            self.position_counts[self.hash] = count
+        else:
+            del self.position_counts[self.hash]
+        self.hash = self.position_history.pop()
+        self._legal_moves = None
         
         # Reset game_over status if we're undoing a terminal state
         self.game_over = False
@@ -236,6 +675,18 @@ class ChessGame:
         
         return True
     
+    def get_move_history(self):
+        """
+        Returns the moves played so far as (from_pos, to_pos) tuples.
+        """
+        return [decode_move(record & MOVE_MASK)[:2] for record in self.move_history]
+    
+    def get_algebraic_history(self):
+        """
+        Returns the moves played so far in coordinate notation, e.g. "e2e4" or "e7e8q".
+        """
+        return [move_to_algebraic(record & MOVE_MASK) for record in self.move_history]
+    
     def get_valid_moves(self, position):
         row, col = position
         piece = self.board[row][col]
@@ -243,29 +694,40 @@ class ChessGame:
         if piece.piece_type == PieceType.EMPTY or piece.color != self.current_player:
             return []
         
+        return list(self.get_legal_moves().get(position, ()))
+    
+    def generate_valid_moves(self, position):
+        """
+        Generates the legal moves of the piece at position, bypassing the cache.
+        """
+        row, col = position
+        piece = self.board[row][col]
         valid_moves = []
+        board = self.board
         
         # Get all possible moves based on piece type
         possible_moves = self.get_possible_moves(position)
         
-        # Filter out moves that would leave the king in check
+        # Filter out moves that would leave the king in check. Each move is
+        # played directly on the board and taken back, without copying it.
         for move in possible_moves:
-            # Make a copy of the current state
-            original_board = self.board.copy()
-            original_current_player = self.current_player
-            original_en_passant = self.en_passant_target
-            original_white_king_pos = self.white_king_pos
-            original_black_king_pos = self.black_king_pos
-            
-            # Make the move directly without validation
-            from_row, from_col = position
             to_row, to_col = move
+            captured = board[to_row][to_col]
+            
+            # A pawn capturing onto the en passant square removes the pawn beside it
+            en_passant_square = None
+            if (piece.piece_type == PieceType.PAWN and to_col != col and
+                    captured.piece_type == PieceType.EMPTY and move == self.en_passant_target):
+                en_passant_square = (row, to_col)
+                en_passant_pawn = board[row][to_col]
+                board[row][to_col] = EMPTY_SQUARE
             
-            # Move the piece
-            self.board[to_row][to_col] = self.board[from_row][from_col]
-            self.board[from_row][from_col] = Piece()
+            board[to_row][to_col] = piece
+            board[row][col] = EMPTY_SQUARE
             
             # Update king position if needed
+            original_white_king_pos = self.white_king_pos
+            original_black_king_pos = self.black_king_pos
             if piece.piece_type == PieceType.KING:
                 if piece.color == Color.WHITE:
                     self.white_king_pos = move
@@ -276,10 +738,11 @@ class ChessGame:
             if not self.is_check(piece.color):
                 valid_moves.append(move)
             
-            # Restore the original state
-            self.board = original_board
-            self.current_player = original_current_player
-            self.en_passant_target = original_en_passant
+            # Take the move back
+            board[row][col] = piece
+            board[to_row][to_col] = captured
+            if en_passant_square is not None:
+                board[row][to_col] = en_passant_pawn
             self.white_king_pos = original_white_king_pos
             self.black_king_pos = original_black_king_pos
         
@@ -315,250 +778,238 @@ class ChessGame:
         
         # Move forward one square
         if 0 <= row + direction < 8 and self.board[row + direction][col].piece_type == PieceType.EMPTY:
-            moves.append((row + direction, col))
+            moves.append(SQUARES[row + direction][col])
             
-            # Move forward two squares if it's the pawn's first move
-            if not piece.has_moved and 0 <= row + 2 * direction < 8 and self.board[row + 2 * direction][col].piece_type == PieceType.EMPTY:
-                moves.append((row + 2 * direction, col))
+            # Move forward two squares from the pawn's starting rank
+            start_row = 6 if piece.color == Color.WHITE else 1
+            if row == start_row and self.board[row + 2 * direction][col].piece_type == PieceType.EMPTY:
+                moves.append(SQUARES[row + 2 * direction][col])
         
         # Capture diagonally
-        for col_offset in [-1, 1]:
-            capture_col = col + col_offset
-            if 0 <= capture_col < 8 and 0 <= row + direction < 8:
-                # Regular capture
-                target = self.board[row + direction][capture_col]
-                if target.piece_type != PieceType.EMPTY and target.color != piece.color:
-                    moves.append((row + direction, capture_col))
-                
-                # En passant capture
-                if self.en_passant_target == (row + direction, capture_col):
-                    moves.append((row + direction, capture_col))
+        for target_pos in PAWN_ATTACKS[piece.color][row][col]:
+            # Regular capture
+            target = self.board[target_pos[0]][target_pos[1]]
+            if target.piece_type != PieceType.EMPTY and target.color != piece.color:
+                moves.append(target_pos)
+            
+            # En passant capture
+            elif self.en_passant_target == target_pos:
+                moves.append(target_pos)
         
         return moves
     
-    def get_knight_moves(self, position):
-        row, col = position
-        piece = self.board[row][col]
-        moves = []
-        
-        # All possible knight moves
-        offsets = [
-            (-2, -1), (-2, 1),
-            (-1, -2), (-1, 2),
-            (1, -2), (1, 2),
-            (2, -1), (2, 1)
-        ]
-        
-        for offset_row, offset_col in offsets:
-            new_row, new_col = row + offset_row, col + offset_col
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                target = self.board[new_row][new_col]
-                if target.piece_type == PieceType.EMPTY or target.color != piece.color:
-                    moves.append((new_row, new_col))
-        
-        return moves
+    def get_step_moves(self, position, targets):
+        # Knight and king steps: any target square not holding one of our own pieces
+        color = self.board[position[0]][position[1]].color
+        board = self.board
+        return [target_pos for target_pos in targets
+                if board[target_pos[0]][target_pos[1]].color != color]
     
-    def get_bishop_moves(self, position):
-        row, col = position
-        piece = self.board[row][col]
+    def get_sliding_moves(self, position, rays):
+        color = self.board[position[0]][position[1]].color
+        board = self.board
         moves = []
         
-        # Diagonal directions
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for direction_row, direction_col in directions:
-            for distance in range(1, 8):
-                new_row, new_col = row + direction_row * distance, col + direction_col * distance
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                
-                target = self.board[new_row][new_col]
+        for ray in rays:
+            for target_pos in ray:
+                target = board[target_pos[0]][target_pos[1]]
                 if target.piece_type == PieceType.EMPTY:
-                    moves.append((new_row, new_col))
-                elif target.color != piece.color:
-                    moves.append((new_row, new_col))
-                    break
+                    moves.append(target_pos)
                 else:
+                    if target.color != color:
+                        moves.append(target_pos)
                     break
         
         return moves
     
+    def get_knight_moves(self, position):
+        row, col = position
+        return self.get_step_moves(position, KNIGHT_TARGETS[row][col])
+    
+    def get_bishop_moves(self, position):
+        row, col = position
+        return self.get_sliding_moves(position, DIAGONAL_RAYS[row][col])
+    
     def get_rook_moves(self, position):
         row, col = position
-        piece = self.board[row][col]
-        moves = []
-        
-        # Horizontal and vertical directions
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        for direction_row, direction_col in directions:
-            for distance in range(1, 8):
-                new_row, new_col = row + direction_row * distance, col + direction_col * distance
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                
-                target = self.board[new_row][new_col]
-                if target.piece_type == PieceType.EMPTY:
-                    moves.append((new_row, new_col))
-                elif target.color != piece.color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-        
-        return moves
+        return self.get_sliding_moves(position, ORTHOGONAL_RAYS[row][col])
     
     def get_queen_moves(self, position):
-        # Queen moves like a bishop and a rook combined
-        return self.get_bishop_moves(position) + self.get_rook_moves(position)
+        row, col = position
+        return self.get_sliding_moves(position, QUEEN_RAYS[row][col])
     
     def get_king_moves(self, position):
         row, col = position
         piece = self.board[row][col]
-        moves = []
         
         # Regular king moves (one square in any direction)
-        for row_offset in range(-1, 2):
-            for col_offset in range(-1, 2):
-                if row_offset == 0 and col_offset == 0:
-                    continue
-                
-                new_row, new_col = row + row_offset, col + col_offset
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    target = self.board[new_row][new_col]
-                    if target.piece_type == PieceType.EMPTY or target.color != piece.color:
-                        moves.append((new_row, new_col))
-        
-        # Castling
-        if not piece.has_moved and not self.is_check(piece.color):
+        moves = self.get_step_moves(position, KING_TARGETS[row][col])
+        
+        # Castling (the rights bits already account for king and rook moves)
+        if piece.color == Color.WHITE:
+            kingside_right, queenside_right = WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            kingside_right, queenside_right = BLACK_KINGSIDE, BLACK_QUEENSIDE
+        
+        if self.castling_rights & (kingside_right | queenside_right) and not self.is_check(piece.color):
             # Kingside castling
-            if (col + 3 < 8 and 
+            if (self.castling_rights & kingside_right and
+                col + 3 < 8 and 
                 self.board[row][col + 3].piece_type == PieceType.ROOK and 
                 self.board[row][col + 3].color == piece.color and 
-                not self.board[row][col + 3].has_moved and
                 self.board[row][col + 1].piece_type == PieceType.EMPTY and 
                 self.board[row][col + 2].piece_type == PieceType.EMPTY and
                 not self.is_square_attacked((row, col + 1), piece.color) and
                 not self.is_square_attacked((row, col + 2), piece.color)):
-                moves.append((row, col + 2))
+                moves.append(SQUARES[row][col + 2])
             
             # Queenside castling
-            if (col - 4 >= 0 and 
+            if (self.castling_rights & queenside_right and
+                col - 4 >= 0 and 
                 self.board[row][col - 4].piece_type == PieceType.ROOK and 
                 self.board[row][col - 4].color == piece.color and 
-                not self.board[row][col - 4].has_moved and
                 self.board[row][col - 1].piece_type == PieceType.EMPTY and 
                 self.board[row][col - 2].piece_type == PieceType.EMPTY and
                 self.board[row][col - 3].piece_type == PieceType.EMPTY and
                 not self.is_square_attacked((row, col - 1), piece.color) and
                 not self.is_square_attacked((row, col - 2), piece.color)):
-                moves.append((row, col - 2))
+                moves.append(SQUARES[row][col - 2])
         
         return moves
     
     def is_valid_move(self, from_pos, to_pos):
-        valid_moves = self.get_valid_moves(from_pos)
-        return to_pos in valid_moves
+        piece = self.board[from_pos[0]][from_pos[1]]
+        if piece.color != self.current_player:
+            return False
+        return to_pos in self.get_legal_moves().get(from_pos, ())
     
     def is_square_attacked(self, position, color):
         row, col = position
+        board = self.board
         opponent_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        pawn, knight, bishop, rook, queen, king = PIECES_BY_COLOR[opponent_color]
         
-        # Check for pawn attacks
-        pawn_direction = 1 if color == Color.WHITE else -1
-        for col_offset in [-1, 1]:
-            attack_row, attack_col = row + pawn_direction, col + col_offset
-            if 0 <= attack_row < 8 and 0 <= attack_col < 8:
-                attacker = self.board[attack_row][attack_col]
-                if attacker.piece_type == PieceType.PAWN and attacker.color == opponent_color:
-                    return True
+        # Check for pawn attacks (from the squares our own pawn would attack)
+        for attack_row, attack_col in PAWN_ATTACKS[color][row][col]:
+            if board[attack_row][attack_col] is pawn:
+                return True
         
         # Check for knight attacks
-        knight_offsets = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-        for offset_row, offset_col in knight_offsets:
-            attack_row, attack_col = row + offset_row, col + offset_col
-            if 0 <= attack_row < 8 and 0 <= attack_col < 8:
-                attacker = self.board[attack_row][attack_col]
-                if attacker.piece_type == PieceType.KNIGHT and attacker.color == opponent_color:
-                    return True
+        for attack_row, attack_col in KNIGHT_TARGETS[row][col]:
+            if board[attack_row][attack_col] is knight:
+                return True
         
         # Check for bishop/queen attacks (diagonals)
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        for direction_row, direction_col in directions:
-            for distance in range(1, 8):
-                attack_row, attack_col = row + direction_row * distance, col + direction_col * distance
-                if not (0 <= attack_row < 8 and 0 <= attack_col < 8):
-                    break
-                
-                attacker = self.board[attack_row][attack_col]
-                if attacker.piece_type != PieceType.EMPTY:
-                    if (attacker.piece_type in [PieceType.BISHOP, PieceType.QUEEN] and 
-                        attacker.color == opponent_color):
+        for ray in DIAGONAL_RAYS[row][col]:
+            for attack_row, attack_col in ray:
+                attacker = board[attack_row][attack_col]
+                if attacker is not EMPTY_SQUARE:
+                    if attacker is bishop or attacker is queen:
                         return True
                     break
         
         # Check for rook/queen attacks (horizontals and verticals)
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        for direction_row, direction_col in directions:
-            for distance in range(1, 8):
-                attack_row, attack_col = row + direction_row * distance, col + direction_col * distance
-                if not (0 <= attack_row < 8 and 0 <= attack_col < 8):
-                    break
-                
-                attacker = self.board[attack_row][attack_col]
-                if attacker.piece_type != PieceType.EMPTY:
-                    if (attacker.piece_type in [PieceType.ROOK, PieceType.QUEEN] and 
-                        attacker.color == opponent_color):
+        for ray in ORTHOGONAL_RAYS[row][col]:
+            for attack_row, attack_col in ray:
+                attacker = board[attack_row][attack_col]
+                if attacker is not EMPTY_SQUARE:
+                    if attacker is rook or attacker is queen:
                         return True
                     break
         
         # Check for king attacks (one square in any direction)
-        for row_offset in range(-1, 2):
-            for col_offset in range(-1, 2):
-                if row_offset == 0 and col_offset == 0:
-                    continue
-                
-                attack_row, attack_col = row + row_offset, col + col_offset
-                if 0 <= attack_row < 8 and 0 <= attack_col < 8:
-                    attacker = self.board[attack_row][attack_col]
-                    if attacker.piece_type == PieceType.KING and attacker.color == opponent_color:
-                        return True
+        for attack_row, attack_col in KING_TARGETS[row][col]:
+            if board[attack_row][attack_col] is king:
+                return True
         
         return False
     
+    def get_attackers(self, position, color, removed=()):
+        """
+        Returns the squares of all color's pieces attacking position, using the
+        same tables as is_square_attacked. Squares in removed are treated as
+        empty, which uncovers sliders behind them (x-rays).
+        """
+        row, col = position
+        board = self.board
+        defender_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        pawn, knight, bishop, rook, queen, king = PIECES_BY_COLOR[color]
+        attackers = []
+        
+        for targets, attacker_piece in ((PAWN_ATTACKS[defender_color][row][col], pawn),
+                                        (KNIGHT_TARGETS[row][col], knight),
+                                        (KING_TARGETS[row][col], king)):
+            for square in targets:
+                if board[square[0]][square[1]] is attacker_piece and square not in removed:
+                    attackers.append(square)
+        
+        for rays, slider in ((DIAGONAL_RAYS[row][col], bishop), (ORTHOGONAL_RAYS[row][col], rook)):
+            for ray in rays:
+                for square in ray:
+                    attacker = board[square[0]][square[1]]
+                    if attacker is EMPTY_SQUARE or square in removed:
+                        continue
+                    if attacker is slider or attacker is queen:
+                        attackers.append(square)
+                    break
+        
+        return attackers
+    
+    def static_exchange_eval(self, from_pos, to_pos, piece_values=None):
+        """
+        Returns the expected material balance for the side moving from_pos of the
+        exchange started by capturing on to_pos, assuming both sides keep
+        recapturing with their least valuable attacker while it pays off.
+        Negative values mean the capture loses material.
+        """
+        piece_values = piece_values or SEE_PIECE_VALUES
+        board = self.board
+        attacker = board[from_pos[0]][from_pos[1]]
+        target = board[to_pos[0]][to_pos[1]]
+        if target.piece_type == PieceType.EMPTY:
+            # En passant takes a pawn; anything else captures nothing
+            target_value = piece_values[PieceType.PAWN] if (attacker.piece_type == PieceType.PAWN and
+                                                            to_pos == self.en_passant_target) else 0
+        else:
+            target_value = piece_values[target.piece_type]
+        
+        gain = [target_value]
+        removed = {from_pos}
+        attacker_value = piece_values[attacker.piece_type]
+        side = Color.BLACK if attacker.color == Color.WHITE else Color.WHITE
+        while True:
+            # Speculative gain if the piece now on the square gets captured
+            gain.append(attacker_value - gain[-1])
+            if max(-gain[-2], gain[-1]) < 0:
+                break
+            
+            attackers = self.get_attackers(to_pos, side, removed)
+            if not attackers:
+                break
+            square = min(attackers, key=lambda square: piece_values[board[square[0]][square[1]].piece_type])
+            removed.add(square)
+            attacker_value = piece_values[board[square[0]][square[1]].piece_type]
+            side = Color.BLACK if side == Color.WHITE else Color.WHITE
+        
+        # Each side may stop capturing when continuing would lose material. The
+        # last entry is a capture that never happens, so it is left out.
+        for depth in range(len(gain) - 2, 0, -1):
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        return gain[0]
+    
     def is_check(self, color):
         king_pos = self.white_king_pos if color == Color.WHITE else self.black_king_pos
         return self.is_square_attacked(king_pos, color)
     
+    def has_legal_moves(self, color):
+        # Only the side to move has legal moves
+        return color == self.current_player and bool(self.get_legal_moves())
+    
     def is_checkmate(self, color):
-        if not self.is_check(color):
-            return False
-        
-        # Check if there are any legal moves
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece.piece_type != PieceType.EMPTY and piece.color == color:
-                    valid_moves = self.get_valid_moves((row, col))
-                    if valid_moves:
-                        return False
-        
-        return True
+        return self.is_check(color) and not self.has_legal_moves(color)
     
     def is_stalemate(self, color):
-        if self.is_check(color):
-            return False
-        
-        # Check if there are any legal moves
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece.piece_type != PieceType.EMPTY and piece.color == color:
-                    valid_moves = self.get_valid_moves((row, col))
-                    if valid_moves:
-                        return False
-        
-        return True
+        return not self.is_check(color) and not self.has_legal_moves(color)
     
     def check_game_end(self):
         if self.is_checkmate(self.current_player):
@@ -571,159 +1022,346 @@ class ChessGame:
             self.winner = None  # Draw
             return True
         
+        if self.is_threefold_repetition() or self.is_fifty_move_draw():
+            self.game_over = True
+            self.winner = None
+            return True
+        
         return False
     
+    def is_repetition(self):
+        """
+        True if the current position occurred earlier in the game.
+        """
+        # Positions after a null move are not counted, so they may be missing
+        return self.position_counts.get(self.hash, 0) > 1
+    
+    def is_threefold_repetition(self):
+        return self.position_counts.get(self.hash, 0) >= 3
+    
+    def is_fifty_move_draw(self):
+        return self.halfmove_clock >= FIFTY_MOVE_HALFMOVES
+    
     def get_all_valid_moves(self, color):
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece.piece_type != PieceType.EMPTY and piece.color == color:
-                    valid_moves = self.get_valid_moves((row, col))
-                    for move in valid_moves:
-                        moves.append(((row, col), move))
-        return moves
+        if color != self.current_player:
+            return []
+        return [(position, move) for position, moves in self.get_legal_moves().items() for move in moves]
+    
+    def make_null_move(self):
+        """
+        Passes the turn without moving, for null-move pruning in search.
+        Returns the state undo_null_move needs to restore.
+        """
+        previous_en_passant = self.en_passant_target
+        previous_hash = self.hash
+        self.hash ^= ZOBRIST_BLACK_TO_MOVE
+        if previous_en_passant is not None:
+            self.hash ^= en_passant_key(self.board, previous_en_passant)
+        self.en_passant_target = None
+        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+        previous_legal_moves = self._legal_moves
+        self._legal_moves = None
+        return previous_en_passant, previous_hash, previous_legal_moves
+    
+    def undo_null_move(self, previous_state):
+        self.en_passant_target, self.hash, self._legal_moves = previous_state
+        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+    
+    def board_array(self):
+        """
+        Returns the board as an (8, 8) int8 array of piece codes
+        (0 empty, +1..+6 white pawn..king, -1..-6 black pawn..king).
+        Requires NumPy.
+        """
+        # NumPy is only needed by the vectorized helpers, so it is imported on first use
+        import numpy as np
+        return np.fromiter((piece.code for rank in self.board for piece in rank), dtype=np.int8, count=64).reshape(8, 8)
     
     def copy(self):
-        new_game = ChessGame()
-        new_game.board = np.array([[piece.copy() for piece in row] for row in self.board])
+        # Pieces are shared flyweights, so a shallow copy of the board is enough
+        new_game = ChessGame.__new__(ChessGame)
+        new_game.board = [rank[:] for rank in self.board]
         new_game.current_player = self.current_player
-        new_game.move_history = copy.deepcopy(self.move_history)
+        new_game.move_history = array(HISTORY_TYPECODE, self.move_history)
+        new_game.hash = self.hash
+        new_game.halfmove_clock = self.halfmove_clock
+        new_game.position_history = array(HISTORY_TYPECODE, self.position_history)
+        new_game.position_counts = dict(self.position_counts)
+        # The cache is never modified in place, so the copy can share it
+        new_game._legal_moves = self._legal_moves
         new_game.en_passant_target = self.en_passant_target
+        new_game.castling_rights = self.castling_rights
         new_game.white_king_pos = self.white_king_pos
         new_game.black_king_pos = self.black_king_pos
         new_game.game_over = self.game_over
         new_game.winner = self.winner
         return new_game
 
+# Default evaluation weights. They are shared by every ChessAI and never
+# modified; load_weights gives an AI its own copies.
+PIECE_VALUES = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 320,
+    PieceType.BISHOP: 330,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 20000
+}
+
+PAWN_TABLE = (
+    (0,  0,  0,  0,  0,  0,  0,  0),
+    (50, 50, 50, 50, 50, 50, 50, 50),
+    (10, 10, 20, 30, 30, 20, 10, 10),
+    (5,  5, 10, 25, 25, 10,  5,  5),
+    (0,  0,  0, 20, 20,  0,  0,  0),
+    (5, -5,-10,  0,  0,-10, -5,  5),
+    (5, 10, 10,-20,-20, 10, 10,  5),
+    (0,  0,  0,  0,  0,  0,  0,  0)
+)
+
+KNIGHT_TABLE = (
+    (-50,-40,-30,-30,-30,-30,-40,-50),
+    (-40,-20,  0,  0,  0,  0,-20,-40),
+    (-30,  0, 10, 15, 15, 10,  0,-30),
+    (-30,  5, 15, 20, 20, 15,  5,-30),
+    (-30,  0, 15, 20, 20, 15,  0,-30),
+    (-30,  5, 10, 15, 15, 10,  5,-30),
+    (-40,-20,  0,  5,  5,  0,-20,-40),
+    (-50,-40,-30,-30,-30,-30,-40,-50)
+)
+
+BISHOP_TABLE = (
+    (-20,-10,-10,-10,-10,-10,-10,-20),
+    (-10,  0,  0,  0,  0,  0,  0,-10),
+    (-10,  0, 10, 10, 10, 10,  0,-10),
+    (-10,  5,  5, 10, 10,  5,  5,-10),
+    (-10,  0,  5, 10, 10,  5,  0,-10),
+    (-10,  5,  5,  5,  5,  5,  5,-10),
+    (-10,  0,  5,  0,  0,  5,  0,-10),
+    (-20,-10,-10,-10,-10,-10,-10,-20)
+)
+
+ROOK_TABLE = (
+    (0,  0,  0,  0,  0,  0,  0,  0),
+    (5, 10, 10, 10, 10, 10, 10,  5),
+    (-5,  0,  0,  0,  0,  0,  0, -5),
+    (-5,  0,  0,  0,  0,  0,  0, -5),
+    (-5,  0,  0,  0,  0,  0,  0, -5),
+    (-5,  0,  0,  0,  0,  0,  0, -5),
+    (-5,  0,  0,  0,  0,  0,  0, -5),
+    (0,  0,  0,  5,  5,  0,  0,  0)
+)
+
+QUEEN_TABLE = (
+    (-20,-10,-10, -5, -5,-10,-10,-20),
+    (-10,  0,  0,  0,  0,  0,  0,-10),
+    (-10,  0,  5,  5,  5,  5,  0,-10),
+    (-5,  0,  5,  5,  5,  5,  0, -5),
+    (0,  0,  5,  5,  5,  5,  0, -5),
+    (-10,  5,  5,  5,  5,  5,  0,-10),
+    (-10,  0,  5,  0,  0,  0,  0,-10),
+    (-20,-10,-10, -5, -5,-10,-10,-20)
+)
+
+KING_TABLE_MIDDLEGAME = (
+    (-30,-40,-40,-50,-50,-40,-40,-30),
+    (-30,-40,-40,-50,-50,-40,-40,-30),
+    (-30,-40,-40,-50,-50,-40,-40,-30),
+    (-30,-40,-40,-50,-50,-40,-40,-30),
+    (-20,-30,-30,-40,-40,-30,-30,-20),
+    (-10,-20,-20,-20,-20,-20,-20,-10),
+    (20, 20,  0,  0,  0,  0, 20, 20),
+    (20, 30, 10,  0,  0, 10, 30, 20)
+)
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time limit is reached.
+    """
+
+# Search scores: a mate found at ply p scores MATE_SCORE - p
+MATE_SCORE = 100000
+INFINITY = float('inf')
+
 class ChessAI:
-    def __init__(self, color, depth=3):
+    # Attribute holding the piece-square table of each piece type
+    TABLE_ATTRIBUTES = {
+        PieceType.PAWN: "pawn_table",
+        PieceType.KNIGHT: "knight_table",
+        PieceType.BISHOP: "bishop_table",
+        PieceType.ROOK: "rook_table",
+        PieceType.QUEEN: "queen_table",
+        PieceType.KING: "king_table_middlegame",
+    }
+    
+    # Piece-square tables, shared until load_weights sets an AI's own
+    pawn_table = PAWN_TABLE
+    knight_table = KNIGHT_TABLE
+    bishop_table = BISHOP_TABLE
+    rook_table = ROOK_TABLE
+    queen_table = QUEEN_TABLE
+    king_table_middlegame = KING_TABLE_MIDDLEGAME
+    
+    # square_values for the default weights, built once per color and read-only
+    _default_square_values = {}
+    
+    def __init__(self, color, depth=3, profile=None, weights=None,
+                 null_move=True, null_move_reduction=2, null_move_min_depth=3,
+                 lmr=True, lmr_reduction=1, lmr_min_depth=3, lmr_min_moves=3,
+                 aspiration_window=50, quiescence_depth=4, see_prune_depth=1, time_limit=None,
+                 node_limit=None):
         self.color = color
         self.depth = depth
-        self.piece_values = {
-            PieceType.PAWN: 100,
-            PieceType.KNIGHT: 320,
-            PieceType.BISHOP: 330,
-            PieceType.ROOK: 500,
-            PieceType.QUEEN: 900,
-            PieceType.KING: 20000
-        }
-        
-        # Position evaluation tables (same as before)
-        self.pawn_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [50, 50, 50, 50, 50, 50, 50, 50],
-            [10, 10, 20, 30, 30, 20, 10, 10],
-            [5,  5, 10, 25, 25, 10,  5,  5],
-            [0,  0,  0, 20, 20,  0,  0,  0],
-            [5, -5,-10,  0,  0,-10, -5,  5],
-            [5, 10, 10,-20,-20, 10, 10,  5],
-            [0,  0,  0,  0,  0,  0,  0,  0]
-        ]
-        
-        self.knight_table = [
-            [-50,-40,-30,-30,-30,-30,-40,-50],
-            [-40,-20,  0,  0,  0,  0,-20,-40],
-            [-30,  0, 10, 15, 15, 10,  0,-30],
-            [-30,  5, 15, 20, 20, 15,  5,-30],
-            [-30,  0, 15, 20, 20, 15,  0,-30],
-            [-30,  5, 10, 15, 15, 10,  5,-30],
-            [-40,-20,  0,  5,  5,  0,-20,-40],
-            [-50,-40,-30,-30,-30,-30,-40,-50]
-        ]
-        
-        self.bishop_table = [
-            [-20,-10,-10,-10,-10,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0, 10, 10, 10, 10,  0,-10],
-            [-10,  5,  5, 10, 10,  5,  5,-10],
-            [-10,  0,  5, 10, 10,  5,  0,-10],
-            [-10,  5,  5,  5,  5,  5,  5,-10],
-            [-10,  0,  5,  0,  0,  5,  0,-10],
-            [-20,-10,-10,-10,-10,-10,-10,-20]
-        ]
-        
-        self.rook_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [5, 10, 10, 10, 10, 10, 10,  5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [0,  0,  0,  5,  5,  0,  0,  0]
-        ]
-        
-        self.queen_table = [
-            [-20,-10,-10, -5, -5,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0,  5,  5,  5,  5,  0,-10],
-            [-5,  0,  5,  5,  5,  5,  0, -5],
-            [0,  0,  5,  5,  5,  5,  0, -5],
-            [-10,  5,  5,  5,  5,  5,  0,-10],
-            [-10,  0,  5,  0,  0,  0,  0,-10],
-            [-20,-10,-10, -5, -5,-10,-10,-20]
-        ]
-        
-        self.king_table_middlegame = [
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-20,-30,-30,-40,-40,-30,-30,-20],
-            [-10,-20,-20,-20,-20,-20,-20,-10],
-            [20, 20,  0,  0,  0,  0, 20, 20],
-            [20, 30, 10,  0,  0, 10, 30, 20]
-        ]
+        self.nodes = 0
+        
+        # Optional budgets per move, in seconds and in nodes; depth is then the maximum depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.deadline = None
+        
+        # (depth, best move, score, nodes, seconds) after each completed iteration of the last search
+        self.iterations = []
+        
+        # Null-move pruning: skip a turn and search with a reduced depth; if the
+        # position still fails high, prune it
+        self.null_move = null_move
+        self.null_move_reduction = null_move_reduction
+        self.null_move_min_depth = null_move_min_depth
+        
+        # Late move reductions: quiet moves ordered late are searched shallower
+        # first and only re-searched at full depth if they beat the bound
+        self.lmr = lmr
+        self.lmr_reduction = lmr_reduction
+        self.lmr_min_depth = lmr_min_depth
+        self.lmr_min_moves = lmr_min_moves
+        
+        # Half-width of the aspiration window around the previous iteration's score
+        self.aspiration_window = aspiration_window
+        
+        # Plies of capture search at the leaves (0 evaluates leaves directly), and
+        # the depth up to which captures losing material by exchange are skipped
+        self.quiescence_depth = quiescence_depth
+        self.see_prune_depth = see_prune_depth
+        
+        # profile may be a SearchProfiler to share, True/False, or None to follow CHESS_PROFILE
+        if isinstance(profile, SearchProfiler):
+            self.profiler = profile
+        elif profile is None:
+            self.profiler = profiler_from_env()
+        else:
+            self.profiler = SearchProfiler() if profile else None
+        
+        # The AI's own copy, so build_eval_tables picks up edits to it
+        self.piece_values = dict(PIECE_VALUES)
+        
+        # (square_values, NumPy copy, square indices) for the vectorized evaluation
+        self._square_value_array = None
+        
+        if weights is not None:
+            self.load_weights(weights)
+        elif color in self._default_square_values:
+            self.square_values = self._default_square_values[color]
+        else:
+            self.build_eval_tables()
+            self._default_square_values[color] = self.square_values
+
+    def load_weights(self, weights):
+        """
+        Loads piece values and piece-square tables, e.g. as exported by chess_tune.py.
+        weights is a path to a JSON file or an equivalent dict:
+        {"piece_values": {"PAWN": 100, ...}, "tables": {"PAWN": [[...8 values...] x 8], ...}}
+        Missing entries keep their current values.
+        """
+        if not isinstance(weights, dict):
+            import json
+            with open(weights, encoding="utf-8") as f:
+                weights = json.load(f)
+        
+        for name, value in weights.get("piece_values", {}).items():
+            self.piece_values[PieceType[name]] = value
+        for name, table in weights.get("tables", {}).items():
+            if len(table) != 8 or any(len(row) != 8 for row in table):
+                raise ValueError(f"Piece-square table for {name} must be 8x8")
+            setattr(self, self.TABLE_ATTRIBUTES[PieceType[name]], [list(row) for row in table])
+        
+        self.build_eval_tables()
+
+    def build_eval_tables(self):
+        """
+        Builds square_values, 13 tuples of 64 values where square_values[code + 6][square]
+        is the material plus positional value of the piece with that code on that
+        square (square = row * 8 + col), from the AI's perspective.
+        Call again after changing piece_values or the piece-square tables.
+        """
+        sign = 1 if self.color == Color.WHITE else -1
+        values = [[0] * 64 for _ in range(13)]
+        for piece_type, attribute in self.TABLE_ATTRIBUTES.items():
+            table = getattr(self, attribute)
+            code = Piece(piece_type, Color.WHITE).code
+            for row in range(8):
+                for col in range(8):
+                    value = sign * (self.piece_values[piece_type] + table[row][col])
+                    values[6 + code][row * 8 + col] = value
+                    # Tables are symmetric for black: mirror the rows and negate
+                    values[6 - code][(7 - row) * 8 + col] = -value
+        
+        self.square_values = tuple(tuple(code_values) for code_values in values)
+
+    def evaluate_pieces(self, board):
+        """
+        Returns the material and positional score of a ChessGame board
+        from the AI's perspective.
+        """
+        square_values = self.square_values
+        score = 0
+        square = 0
+        for rank in board:
+            for piece in rank:
+                score += square_values[piece.code + 6][square]
+                square += 1
+        return score
+
+    def evaluate_material(self, board):
+        """
+        Returns the material and positional score of one int8 board
+        (see ChessGame.board_array) from the AI's perspective. Requires NumPy.
+        """
+        return float(self.evaluate_many(board)[0])
+
+    def evaluate_many(self, boards):
+        """
+        Scores a stacked batch of int8 boards, shaped (N, 8, 8) or (N, 64), in one call.
+        Requires NumPy.
+        Returns a float array of material and positional scores from the AI's
+        perspective; mobility and king safety need move generation and are
+        only part of evaluate_board.
+        """
+        import numpy as np
+        values, squares = self.square_value_array()
+        codes = np.asarray(boards).reshape(-1, 64).astype(np.intp) + 6
+        return values[codes, squares].sum(axis=1)
+
+    def square_value_array(self):
+        """
+        Returns square_values as a (13, 64) float64 array and the square indices
+        0..63 for indexing it. Both are built once per square_values table.
+        Requires NumPy.
+        """
+        cached = self._square_value_array
+        if cached is None or cached[0] is not self.square_values:
+            import numpy as np
+            values = np.array(self.square_values, dtype=np.float64)
+            values.setflags(write=False)
+            cached = self._square_value_array = (self.square_values, values, np.arange(64))
+        return cached[1], cached[2]
 
     def evaluate_board(self, game):
         """
         Evaluate the current board position from the AI's perspective.
         Returns a score where positive values favor the AI.
         """
-        score = 0
-        
-        # Material evaluation
-        for row in range(8):
-            for col in range(8):
-                piece = game.board[row][col]
-                if piece.piece_type != PieceType.EMPTY:
-                    # Base piece value
-                    piece_value = self.piece_values[piece.piece_type]
-                    
-                    # Positional value
-                    if piece.color == Color.WHITE:
-                        if piece.piece_type == PieceType.PAWN:
-                            piece_value += self.pawn_table[row][col]
-                        elif piece.piece_type == PieceType.KNIGHT:
-                            piece_value += self.knight_table[row][col]
-                        elif piece.piece_type == PieceType.BISHOP:
-                            piece_value += self.bishop_table[row][col]
-                        elif piece.piece_type == PieceType.ROOK:
-                            piece_value += self.rook_table[row][col]
-                        elif piece.piece_type == PieceType.QUEEN:
-                            piece_value += self.queen_table[row][col]
-                        elif piece.piece_type == PieceType.KING:
-                            piece_value += self.king_table_middlegame[row][col]
-                    else:  # Black pieces (tables are symmetric for black)
-                        if piece.piece_type == PieceType.PAWN:
-                            piece_value += self.pawn_table[7-row][col]
-                        elif piece.piece_type == PieceType.KNIGHT:
-                            piece_value += self.knight_table[7-row][col]
-                        elif piece.piece_type == PieceType.BISHOP:
-                            piece_value += self.bishop_table[7-row][col]
-                        elif piece.piece_type == PieceType.ROOK:
-                            piece_value += self.rook_table[7-row][col]
-                        elif piece.piece_type == PieceType.QUEEN:
-                            piece_value += self.queen_table[7-row][col]
-                        elif piece.piece_type == PieceType.KING:
-                            piece_value += self.king_table_middlegame[7-row][col]
-                    
-                    # Add or subtract based on color
-                    if piece.color == self.color:
-                        score += piece_value
-                    else:
-                        score -= piece_value
+        # Material and positional evaluation
+        score = self.evaluate_pieces(game.board)
         
         # Mobility evaluation (number of legal moves)
         ai_moves = len(game.get_all_valid_moves(self.color))
@@ -741,79 +1379,282 @@ class ChessAI:
 
     def get_best_move(self, game):
         """
-        Returns the best move for the AI using min-max with alpha-beta pruning.
-        Returns a tuple of (from_pos, to_pos).
+        Returns the best move for the AI using an iterative-deepening principal
+        variation search with alpha-beta pruning. Returns a tuple of (from_pos, to_pos).
         """
-        best_move = None
-        best_value = -float('inf')
-        alpha = -float('inf')
-        beta = float('inf')
+        if self.profiler is None:
+            return self.search_root(game)
         
-        # Get all possible moves
-        possible_moves = game.get_all_valid_moves(self.color)
+        with self.profiler.instrument(ChessGame, ChessAI):
+            return self.search_root(game)
+
+    def check_limits(self):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+        # Reading the clock is comparatively slow, so only every 256 nodes
+        if self.deadline is not None and not self.nodes & 0xFF and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def search_root(self, game):
+        """
+        Iterative deepening from depth 1 to self.depth. Each iteration searches
+        the previous best move first, inside an aspiration window centered on
+        the previous score that is widened when the result falls outside it.
+        With a time or node limit, the best move of the last completed iteration
+        is returned once the limit is reached.
+        """
+        self.nodes = 0
+        self.iterations = []
+        start = time.perf_counter()
+        self.deadline = None if self.time_limit is None else start + self.time_limit
+        moves = self.order_moves(game, game.get_all_valid_moves(self.color))
+        if not moves:
+            return None
         
-        # Try each move and evaluate it
-        for move in possible_moves:
-            from_pos, to_pos = move
-            game_copy = game.copy()
-            game_copy.make_move(from_pos, to_pos)
+        best_move = moves[0]
+        score = None
+        for depth in range(1, self.depth + 1):
+            if score is None or not self.aspiration_window:
+                alpha, beta = -INFINITY, INFINITY
+            else:
+                alpha, beta = score - self.aspiration_window, score + self.aspiration_window
             
-            # Perform min-max search
-            move_value = self.minimax(game_copy, self.depth - 1, alpha, beta, False)
+            while True:
+                try:
+                    value, move = self.search_moves(game, moves, depth, alpha, beta)
+                except SearchTimeout:
+                    ai_logger.debug("Search limit reached at depth %d after %d nodes", depth, self.nodes)
+                    return best_move
+                if value <= alpha and alpha > -INFINITY:
+                    alpha = -INFINITY  # Fail low: re-search with the lower bound opened
+                elif value >= beta and beta < INFINITY:
+                    beta = INFINITY  # Fail high: re-search with the upper bound opened
+                else:
+                    break
             
-            # Update best move if this one is better
-            if move_value > best_value:
-                best_value = move_value
-                best_move = move
+            score, best_move = value, move
+            self.iterations.append((depth, best_move, score, self.nodes, time.perf_counter() - start))
+            ai_logger.debug("Depth %d: best move %s (score %s, %d nodes)", depth, best_move, score, self.nodes)
             
-            # Update alpha
-            alpha = max(alpha, best_value)
+            # Search the best move first in the next iteration
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+        
+        return best_move
+
+    def search_moves(self, game, moves, depth, alpha, beta):
+        """
+        Principal variation search over the root moves.
+        Returns (score, best move).
+        """
+        best_value = -INFINITY
+        best_move = moves[0]
+        for index, move in enumerate(moves):
+            from_pos, to_pos = move
+            game.make_move(from_pos, to_pos, skip_validation=True)
+            try:
+                if index == 0:
+                    value = -self.negamax(game, depth - 1, -beta, -alpha, 1)
+                else:
+                    value = -self.negamax(game, depth - 1, -alpha - 1, -alpha, 1)
+                    if alpha < value < beta:
+                        value = -self.negamax(game, depth - 1, -beta, -alpha, 1)
+            finally:
+                # Also taken back when the search runs out of time
+                game.undo_move()
             
-            # Alpha-beta pruning
-            if beta <= alpha:
+            if value > best_value:
+                best_value = value
+                best_move = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
                 break
         
-        return best_move
+        return best_value, best_move
 
-    def minimax(self, game, depth, alpha, beta, maximizing_player):
-        """
-        Min-max algorithm with alpha-beta pruning.
-        Returns the evaluation of the position.
-        """
-        # Base case: return evaluation if we've reached max depth or game is over
-        if depth == 0 or game.game_over:
-            return self.evaluate_board(game)
-        
-        if maximizing_player:
-            max_eval = -float('inf')
-            for move in game.get_all_valid_moves(self.color):
-                from_pos, to_pos = move
-                game_copy = game.copy()
-                game_copy.make_move(from_pos, to_pos)
-                
-                eval = self.minimax(game_copy, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval)
-                
-                # Alpha-beta pruning
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
+    def is_capture(self, game, move):
+        from_pos, to_pos = move
+        if game.board[to_pos[0]][to_pos[1]].piece_type != PieceType.EMPTY:
+            return True
+        # En passant
+        return (game.board[from_pos[0]][from_pos[1]].piece_type == PieceType.PAWN and
+                to_pos == game.en_passant_target)
+
+    def is_quiet(self, game, move):
+        """
+        A quiet move is neither a capture nor a promotion.
+        """
+        from_pos, to_pos = move
+        if self.is_capture(game, move):
+            return False
+        piece = game.board[from_pos[0]][from_pos[1]]
+        return not (piece.piece_type == PieceType.PAWN and to_pos[0] in (0, 7))
+
+    def see(self, game, move):
+        return game.static_exchange_eval(move[0], move[1], self.piece_values)
+
+    def order_moves(self, game, moves):
+        """
+        Orders moves as: captures that win or hold material by static exchange
+        evaluation (most valuable victim / least valuable attacker first) and
+        promotions, then quiet moves, then losing captures (least bad first).
+        """
+        def move_score(move):
+            from_pos, to_pos = move
+            if self.is_quiet(game, move):
+                return (1, 0)
+            if not self.is_capture(game, move):
+                return (2, 0)  # Promotion
+            
+            exchange = self.see(game, move)
+            if exchange < 0:
+                return (0, exchange)
+            victim = game.board[to_pos[0]][to_pos[1]]
+            victim_type = PieceType.PAWN if victim.piece_type == PieceType.EMPTY else victim.piece_type
+            attacker = game.board[from_pos[0]][from_pos[1]]
+            return (2, 10 * self.piece_values[victim_type] - self.piece_values[attacker.piece_type])
+        
+        return sorted(moves, key=move_score, reverse=True)
+
+    def has_non_pawn_material(self, game, color):
+        for row in game.board:
+            for piece in row:
+                if (piece.color == color and
+                        piece.piece_type not in (PieceType.PAWN, PieceType.KING)):
+                    return True
+        return False
+
+    def null_move_cutoff(self, game, depth, beta, ply):
+        """
+        Returns True if passing the turn still fails high for the side to move,
+        in which case the node can be pruned. Only king-and-pawn positions are
+        prone to zugzwang, so there a fail-high is verified by a reduced search
+        without null moves before trusting it.
+        """
+        reduced_depth = max(depth - 1 - self.null_move_reduction, 0)
+        previous_state = game.make_null_move()
+        try:
+            value = -self.negamax(game, reduced_depth, -beta, -beta + 1, ply + 1, allow_null=False)
+        finally:
+            game.undo_null_move(previous_state)
+        
+        if value < beta:
+            return False
+        if self.has_non_pawn_material(game, game.current_player):
+            return True
+        
+        # Verification search for zugzwang-prone endgames
+        verify_depth = max(depth - self.null_move_reduction, 1)
+        return self.negamax(game, verify_depth, beta - 1, beta, ply, allow_null=False) >= beta
+
+    def negamax(self, game, depth, alpha, beta, ply, allow_null=True):
+        """
+        Negamax principal variation search with alpha-beta pruning, null-move
+        pruning and late move reductions. The first move is searched with the
+        full window, the rest with a null window and re-searched if they beat
+        alpha. Returns the score from the side to move's perspective.
+        """
+        # Leaves (and their node count) are handled by the quiescence search
+        if depth == 0:
+            return self.quiescence(game, alpha, beta, ply, self.quiescence_depth)
+        
+        self.nodes += 1
+        self.check_limits()
+        if game.game_over:
+            # Prefer the quickest mate
+            return -(MATE_SCORE - ply) if game.winner is not None else 0
+        
+        # Any repetition inside the search is scored as a draw right away
+        if game.is_repetition() or game.is_fifty_move_draw():
+            return 0
+        
+        in_check = game.is_check(game.current_player)
+        
+        # Null-move pruning
+        if (self.null_move and allow_null and not in_check and depth >= self.null_move_min_depth and
+                self.null_move_cutoff(game, depth, beta, ply)):
+            return beta
+        
+        moves = self.order_moves(game, game.get_all_valid_moves(game.current_player))
+        
+        best_value = -INFINITY
+        for index, move in enumerate(moves):
+            from_pos, to_pos = move
             
-            return max_eval
+            # Near the leaves, skip captures that lose material by exchange
+            if (index > 0 and depth <= self.see_prune_depth and not in_check and
+                    self.is_capture(game, move) and self.see(game, move) < 0):
+                continue
+            
+            reduce = (self.lmr and depth >= self.lmr_min_depth and index >= self.lmr_min_moves and
+                      not in_check and self.is_quiet(game, move))
+            game.make_move(from_pos, to_pos, skip_validation=True)
+            try:
+                if index == 0:
+                    value = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                else:
+                    # Late move reduction, unless the move gives check
+                    reduction = self.lmr_reduction if reduce and not game.is_check(game.current_player) else 0
+                    value = -self.negamax(game, max(depth - 1 - reduction, 0), -alpha - 1, -alpha, ply + 1)
+                    if value > alpha and reduction:
+                        value = -self.negamax(game, depth - 1, -alpha - 1, -alpha, ply + 1)
+                    if alpha < value < beta:
+                        value = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.undo_move()
+            
+            if value > best_value:
+                best_value = value
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        
+        return best_value
+
+    def quiescence(self, game, alpha, beta, ply, depth):
+        """
+        Searches captures (and check evasions) until the position is quiet, so
+        leaf scores are not taken in the middle of an exchange. The side to
+        move may stand pat on the static evaluation; captures that lose
+        material by static exchange evaluation are pruned.
+        Returns the score from the side to move's perspective.
+        """
+        self.nodes += 1
+        self.check_limits()
+        
+        if game.game_over:
+            return -(MATE_SCORE - ply) if game.winner is not None else 0
+        if game.is_repetition() or game.is_fifty_move_draw():
+            return 0
+        
+        in_check = game.is_check(game.current_player)
+        if depth <= 0 or not in_check:
+            score = self.evaluate_board(game)
+            score = score if game.current_player == self.color else -score
+            if depth <= 0 or score >= beta:
+                return score
+            alpha = max(alpha, score)
+            best_value = score
         else:
-            min_eval = float('inf')
-            opponent_color = Color.BLACK if self.color == Color.WHITE else Color.WHITE
-            for move in game.get_all_valid_moves(opponent_color):
-                from_pos, to_pos = move
-                game_copy = game.copy()
-                game_copy.make_move(from_pos, to_pos)
-                
-                eval = self.minimax(game_copy, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval)
-                
-                # Alpha-beta pruning
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
+            best_value = -INFINITY
+        
+        moves = game.get_all_valid_moves(game.current_player)
+        if not in_check:
+            moves = [move for move in moves if not self.is_quiet(game, move) and
+                     (not self.is_capture(game, move) or self.see(game, move) >= 0)]
+        
+        for move in self.order_moves(game, moves):
+            from_pos, to_pos = move
+            game.make_move(from_pos, to_pos, skip_validation=True)
+            try:
+                value = -self.quiescence(game, -beta, -alpha, ply + 1, depth - 1)
+            finally:
+                game.undo_move()
             
-            return min_eval
\ No newline at end of file
+            if value > best_value:
+                best_value = value
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        
+        return best_value
@@ -0,0 +1,61 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+from Chess import ChessGame, ChessAI, Color
+
+# A fixed opening, so "played" games carry history, repetition state and a legal-move cache
+OPENING = [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2)),
+           ((7, 5), (4, 2)), ((0, 6), (2, 5)), ((6, 3), (5, 3)), ((1, 3), (2, 3))]
+
+
+def played_game(plies):
+    game = ChessGame()
+    for move in OPENING[:plies]:
+        game.make_move(*move)
+    return game
+
+
+def bytes_per_object(factory, count):
+    """
+    Creates count objects with factory() and returns the memory traced while
+    they are all alive, divided by count. Shared, module-level data that
+    already exists is not counted.
+    """
+    factory()  # Warm up lazily built shared data
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory cost of live ChessGame and ChessAI instances.")
+    parser.add_argument("--games", type=int, default=10000, help="games created per measurement")
+    parser.add_argument("--ais", type=int, default=1000, help="AI instances created")
+    parser.add_argument("--plies", type=int, default=len(OPENING), help="plies played in the 'played' games")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {
+        "game_new": bytes_per_object(ChessGame, args.games),
+        "game_played": bytes_per_object(lambda: played_game(args.plies), args.games),
+        "ai": bytes_per_object(lambda: ChessAI(Color.BLACK, profile=False), args.ais),
+    }
+    for name, size in results.items():
+        print(f"{name:<12}{size:>12,.0f} bytes  {size * 100000 / 2 ** 20:>10,.1f} MiB per 100k")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({name: round(size) for name, size in results.items()}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a fresh interpreter: imports the engine, builds an AI and searches the first move
+FIRST_MOVE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from Chess import ChessGame, ChessAI, Color
+imported = time.perf_counter()
+game = ChessGame()
+ai = ChessAI(Color.WHITE, depth={depth}, profile=False)
+constructed = time.perf_counter()
+ai.get_best_move(game)
+searched = time.perf_counter()
+print(json.dumps({{
+    "import_ms": 1000 * (imported - start),
+    "construct_ms": 1000 * (constructed - imported),
+    "search_ms": 1000 * (searched - constructed),
+    "numpy_loaded": "numpy" in sys.modules,
+}}))
+"""
+
+
+def import_times(module):
+    """
+    Imports module in a fresh interpreter with -X importtime. Returns a list of
+    (name, self_us, cumulative_us), one per imported module, in import order.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def first_move(depth):
+    """
+    Times a fresh process from launch to its first get_best_move.
+    Returns the child's breakdown plus total_ms, the wall time of the whole process.
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", FIRST_MOVE_SCRIPT.format(depth=depth)],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    total_ms = 1000 * (time.perf_counter() - start)
+    timings = json.loads(result.stdout.splitlines()[-1])
+    timings["total_ms"] = total_ms
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Chess.py import time and time to the first AI move.")
+    parser.add_argument("--module", default="Chess")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the first move")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement (medians are reported)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    module_ms = statistics.median(cumulative for entries in runs
+                                  for name, _, cumulative in entries if name == args.module) / 1000
+    print(f"import {args.module}: {module_ms:.1f} ms (cumulative, median of {args.runs})")
+    slowest = sorted(runs[-1], key=lambda entry: -entry[1])[:args.top]
+    for name, self_us, cumulative_us in slowest:
+        print(f"  {name:<40}{self_us / 1000:>8.1f} ms self{cumulative_us / 1000:>9.1f} ms cumulative")
+
+    samples = [first_move(args.depth) for _ in range(args.runs)]
+    first = {key: statistics.median(sample[key] for sample in samples)
+             for key in ("import_ms", "construct_ms", "search_ms", "total_ms")}
+    first["numpy_loaded"] = any(sample["numpy_loaded"] for sample in samples)
+    print(f"first get_best_move (depth {args.depth}): {first['total_ms']:.1f} ms from launch "
+          f"(import {first['import_ms']:.1f}, ChessAI() {first['construct_ms']:.1f}, "
+          f"search {first['search_ms']:.1f}); NumPy loaded: {first['numpy_loaded']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"import_ms": module_ms, "first_move": first,
+                       "slowest_imports": [{"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+                                           for name, self_us, cumulative_us in slowest]}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+from Chess import ChessGame, ChessAI
+from chess_logging import configure_from_env, get_logger
+
+logger = get_logger("ai")
+
+DEFAULT_SUITE = "epd/wac_sample.epd"
+DEFAULT_FIXED_DEPTH = 3
+# With a time or node budget the depth only caps iterative deepening
+MAX_DEPTH = 64
+
+
+def parse_epd(line):
+    """
+    Parses one EPD record, e.g.
+        2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - bm Qg6; id "WAC.001";
+    Returns a dict with the position as a FEN, its best moves (bm) and moves to
+    avoid (am) in SAN, and its id.
+    Raises ValueError if the record has no position.
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD record: {line!r}")
+    record = {"fen": " ".join(fields[:4]) + " 0 1", "bm": [], "am": [], "id": None}
+
+    for operation in (fields[4] if len(fields) > 4 else "").split(";"):
+        opcode, _, operands = operation.strip().partition(" ")
+        if opcode in ("bm", "am"):
+            record[opcode] = operands.split()
+        elif opcode == "id":
+            record["id"] = operands.strip().strip('"')
+    return record
+
+
+def load_suite(path):
+    with open(path, encoding="utf-8") as f:
+        records = [parse_epd(line) for line in f if line.strip() and not line.startswith("#")]
+    for index, record in enumerate(records):
+        if record["id"] is None:
+            record["id"] = f"{path}:{index + 1}"
+    return records
+
+
+def normalize_san(san):
+    # Check, mate and annotation marks differ between suites
+    return san.rstrip("+#!?")
+
+
+def is_correct(record, san):
+    san = normalize_san(san)
+    if record["bm"] and san not in {normalize_san(move) for move in record["bm"]}:
+        return False
+    return san not in {normalize_san(move) for move in record["am"]}
+
+
+def solve(record, depth, time_limit=None, node_limit=None):
+    """
+    Searches one position. The time and nodes to solution are those of the
+    first iteration from which the AI's best move stayed correct.
+    """
+    game = ChessGame.from_fen(record["fen"])
+    ai = ChessAI(game.current_player, depth=depth, profile=False, time_limit=time_limit, node_limit=node_limit)
+
+    start = time.perf_counter()
+    move = ai.get_best_move(game)
+    elapsed = time.perf_counter() - start
+
+    san = None if move is None else game.move_to_san(*move)
+    result = {
+        "id": record["id"],
+        "move": san,
+        "solved": san is not None and is_correct(record, san),
+        "depth": ai.iterations[-1][0] if ai.iterations else 0,
+        "nodes": ai.nodes,
+        "seconds": round(elapsed, 4),
+        "solution_depth": None,
+        "solution_nodes": None,
+        "solution_seconds": None,
+    }
+    if result["solved"]:
+        first = len(ai.iterations)
+        while first > 0 and is_correct(record, game.move_to_san(*ai.iterations[first - 1][1])):
+            first -= 1
+        if first < len(ai.iterations):
+            solution_depth, _, _, solution_nodes, solution_seconds = ai.iterations[first]
+            result.update(solution_depth=solution_depth, solution_nodes=solution_nodes,
+                          solution_seconds=round(solution_seconds, 4))
+    return result
+
+
+def signature(results):
+    """
+    Digest of each position's chosen move and node count. In fixed-depth mode
+    the search is deterministic, so any change flags a change in search behavior.
+    """
+    digest = hashlib.sha256()
+    for result in results:
+        digest.update(f"{result['id']} {result['move']} {result['nodes']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def run_suite(records, depth, time_limit=None, node_limit=None):
+    results = []
+    for record in records:
+        result = solve(record, depth, time_limit, node_limit)
+        logger.info("%s: %s %s (%d nodes, %.2fs)", result["id"], result["move"],
+                    "solved" if result["solved"] else "missed", result["nodes"], result["seconds"])
+        results.append(result)
+
+    nodes = sum(result["nodes"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    summary = {
+        "positions": len(results),
+        "solved": sum(result["solved"] for result in results),
+        "nodes": nodes,
+        "seconds": round(seconds, 3),
+        "nodes_per_second": round(nodes / seconds) if seconds else 0,
+    }
+    return results, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run ChessAI over an EPD tactical suite (bm/am records).")
+    parser.add_argument("suite", nargs="?", default=DEFAULT_SUITE, help="EPD file")
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    parser.add_argument("--depth", type=int, help=f"search depth (default {DEFAULT_FIXED_DEPTH} without "
+                                                   f"a budget, otherwise a cap of {MAX_DEPTH})")
+    parser.add_argument("--expect", metavar="SIGNATURE", help="fail if the fixed-depth signature differs")
+    parser.add_argument("--output", metavar="PATH", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+    fixed_depth = args.time is None and args.nodes is None
+    depth = args.depth or (DEFAULT_FIXED_DEPTH if fixed_depth else MAX_DEPTH)
+
+    results, summary = run_suite(load_suite(args.suite), depth, args.time, args.nodes)
+    report = {
+        "suite": args.suite,
+        "mode": "fixed_depth" if fixed_depth else "budget",
+        "depth": depth,
+        "time_limit": args.time,
+        "node_limit": args.nodes,
+        "summary": summary,
+        "positions": results,
+    }
+    if fixed_depth:
+        report["signature"] = signature(results)
+
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.expect and report.get("signature") != args.expect:
+        print(f"Signature mismatch: expected {args.expect}, got {report.get('signature')}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
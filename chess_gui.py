@@ -1,9 +1,12 @@
 import pygame
 import os
 from Chess import Piece, Color, PieceType, ChessAI
+from chess_logging import get_logger
+
+logger = get_logger("gui")
 
 class ChessGUI:
-    def __init__(self, game):
+    def __init__(self, game, profile=None):
         pygame.init()
         self.game = game
         self.square_size = 80
@@ -16,7 +19,7 @@ class ChessGUI:
         self.valid_moves = []
         self.font = pygame.font.SysFont('Arial', 24)
         self.ai_thinking = False
-        self.ai = ChessAI(Color.BLACK, depth=3)
+        self.ai = ChessAI(Color.BLACK, depth=3, profile=profile)
         self.last_ai_check_time = 0
         self.ai_check_delay = 100  # milliseconds
         
@@ -27,7 +30,7 @@ class ChessGUI:
         
         # Create images directory if it doesn't exist
         if not os.path.exists('images'):
-            print("Creating images directory...")
+            logger.info("Creating images directory...")
             os.makedirs('images')
         
         # Load white pieces (uppercase)
@@ -35,19 +38,19 @@ class ChessGUI:
             try:
                 image_path = f"images/{piece}.png"
                 if os.path.exists(image_path):
-                    print(f"Loading image for white piece {piece} from {image_path}")
+                    logger.debug("Loading image for white piece %s from %s", piece, image_path)
                     self.piece_images[piece] = pygame.transform.scale(
                         pygame.image.load(image_path),
                         (self.square_size, self.square_size))
                 else:
-                    print(f"No image found for white piece {piece}, using fallback")
+                    logger.warning("No image found for white piece %s, using fallback", piece)
                     surf = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
                     pygame.draw.circle(surf, (255, 255, 255), 
                                      (self.square_size//2, self.square_size//2),
                                      self.square_size//3)
                     self.piece_images[piece] = surf
             except Exception as e:
-                print(f"Error loading image for white piece {piece}: {e}")
+                logger.warning("Error loading image for white piece %s: %s", piece, e)
                 surf = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
                 pygame.draw.circle(surf, (255, 255, 255), 
                                  (self.square_size//2, self.square_size//2),
@@ -59,19 +62,19 @@ class ChessGUI:
             try:
                 image_path = f"images/{piece} (2).png"  # Note the space and (2)
                 if os.path.exists(image_path):
-                    print(f"Loading image for black piece {piece} from {image_path}")
+                    logger.debug("Loading image for black piece %s from %s", piece, image_path)
                     self.piece_images[piece] = pygame.transform.scale(
                         pygame.image.load(image_path),
                         (self.square_size, self.square_size))
                 else:
-                    print(f"No image found for black piece {piece}, using fallback")
+                    logger.warning("No image found for black piece %s, using fallback", piece)
                     surf = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
                     pygame.draw.circle(surf, (0, 0, 0), 
                                      (self.square_size//2, self.square_size//2),
                                      self.square_size//3)
                     self.piece_images[piece] = surf
             except Exception as e:
-                print(f"Error loading image for black piece {piece}: {e}")
+                logger.warning("Error loading image for black piece %s: %s", piece, e)
                 surf = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
                 pygame.draw.circle(surf, (0, 0, 0), 
                                  (self.square_size//2, self.square_size//2),
@@ -154,37 +157,37 @@ class ChessGUI:
                     if self.game.current_player == Color.WHITE:  # Only process clicks during White's turn
                         pos = pygame.mouse.get_pos()
                         square = self.square_under_mouse(pos)
-                        print(f"Clicked square: {square}")  # Debug print
+                        logger.debug("Clicked square: %s", square)
                         
                         if square:
                             row, col = square
                             piece = self.game.board[row][col]
-                            print(f"Piece at clicked square: {piece}, Color: {piece.color}")  # Debug print
+                            logger.debug("Piece at clicked square: %s, Color: %s", piece, piece.color)
                             
                             # If we've already selected a piece
                             if self.selected_piece:
                                 from_row, from_col = self.selected_piece
                                 # Try to move if the target square is a valid move
                                 if (row, col) in self.valid_moves:
-                                    print(f"Moving piece from {self.selected_piece} to {square}")  # Debug print
+                                    logger.debug("Moving piece from %s to %s", self.selected_piece, square)
                                     if self.game.make_move((from_row, from_col), (row, col)):
                                         self.selected_piece = None
                                         self.valid_moves = []
                                 # Otherwise, try to select a new piece
                                 elif piece.color == Color.WHITE:
-                                    print(f"Selecting new white piece at {square}")  # Debug print
+                                    logger.debug("Selecting new white piece at %s", square)
                                     self.selected_piece = (row, col)
                                     self.valid_moves = self.game.get_valid_moves((row, col))
-                                    print(f"Valid moves: {self.valid_moves}")  # Debug print
+                                    logger.debug("Valid moves: %s", self.valid_moves)
                                 else:
                                     self.selected_piece = None
                                     self.valid_moves = []
                             # No piece is selected yet
                             elif piece.color == Color.WHITE:
-                                print(f"Selecting white piece at {square}")  # Debug print
+                                logger.debug("Selecting white piece at %s", square)
                                 self.selected_piece = (row, col)
                                 self.valid_moves = self.game.get_valid_moves((row, col))
-                                print(f"Valid moves: {self.valid_moves}")  # Debug print
+                                logger.debug("Valid moves: %s", self.valid_moves)
             
             # Process AI move if it's Black's turn (with delay)
             if (self.game.current_player == Color.BLACK and 
@@ -193,14 +196,14 @@ class ChessGUI:
                 current_time - self.last_ai_check_time >= self.ai_check_delay):
                 
                 self.ai_thinking = True
-                print("AI thinking...")  # Debug print
+                logger.debug("AI thinking...")
                 best_move = self.ai.get_best_move(self.game)
                 if best_move:
                     from_pos, to_pos = best_move
-                    print(f"AI moving from {from_pos} to {to_pos}")  # Debug print
+                    logger.debug("AI moving from %s to %s", from_pos, to_pos)
                     self.game.make_move(from_pos, to_pos)
                 else:
-                    print("AI couldn't find a move")  # Debug print
+                    logger.warning("AI couldn't find a move")
                 self.ai_thinking = False
                 self.last_ai_check_time = current_time
             
@@ -209,4 +212,6 @@ class ChessGUI:
             pygame.display.flip()
             clock.tick(60)
         
+        if self.ai.profiler is not None:
+            logger.info("AI search profile:\n%s", self.ai.profiler.report())
         pygame.quit()
\ No newline at end of file
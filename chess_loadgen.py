@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from Chess import ChessGame
+from chess_logging import configure_from_env
+from chess_server import ChessServer, DEFAULT_PORT, format_move
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class GameClient:
+    """
+    Plays one game against the server over its own connection, choosing
+    random legal moves and recording the latency of every move request.
+    """
+    def __init__(self, host, port, rng, depth, time_limit, retry_delay=0.05, max_retry_delay=2.0):
+        self.host = host
+        self.port = port
+        self.rng = rng
+        self.depth = depth
+        self.time_limit = time_limit
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.latencies = []
+        self.busy = 0
+        self.errors = 0
+
+    async def request(self, reader, writer, message):
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def play(self, plies):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=1 << 20)
+        try:
+            response = await self.request(reader, writer, {"op": "new", "ai_color": "BLACK", "depth": self.depth,
+                                                           "time_limit": self.time_limit})
+            if not response["ok"]:
+                self.errors += 1
+                return
+            game_id = response["game"]
+            game = ChessGame()
+
+            for _ in range(plies):
+                if game.game_over:
+                    break
+                move = self.rng.choice(game.get_all_valid_moves(game.current_player))
+                text = format_move(game, move)
+
+                # Latency includes the retries after busy responses
+                start = time.perf_counter()
+                delay = self.retry_delay
+                while True:
+                    response = await self.request(reader, writer, {"op": "move", "game": game_id, "move": text})
+                    if response.get("error") != "busy":
+                        break
+                    # Back off exponentially, with jitter so retries do not arrive together
+                    self.busy += 1
+                    await asyncio.sleep(delay * (1 + self.rng.random()))
+                    delay = min(2 * delay, self.max_retry_delay)
+                if not response["ok"]:
+                    self.errors += 1
+                    return
+                self.latencies.append(time.perf_counter() - start)
+
+                game.make_move(*move)
+                if response["reply"] is not None:
+                    game.make_move(*game.parse_move(response["reply"]))
+
+            await self.request(reader, writer, {"op": "close", "game": game_id})
+        except (ConnectionError, ValueError, KeyError):
+            self.errors += 1
+        finally:
+            writer.close()
+
+
+async def run_level(host, port, games, plies, depth, time_limit, seed=0):
+    """
+    Plays the given number of games concurrently and returns throughput and
+    latency statistics for the move requests.
+    """
+    clients = [GameClient(host, port, random.Random(seed + index), depth, time_limit) for index in range(games)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client.play(plies) for client in clients))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    return {
+        "games": games,
+        "moves": len(latencies),
+        "seconds": round(elapsed, 3),
+        "moves_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 1),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 1),
+        "busy": sum(client.busy for client in clients),
+        "errors": sum(client.errors for client in clients),
+    }
+
+
+async def run(args):
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        # No server given: run one in this process (its searches still use worker processes)
+        server = ChessServer(host, 0, workers=args.workers, max_pending=args.max_pending, time_limit=args.time_limit)
+        await server.start()
+        port = server.port
+
+    results = []
+    try:
+        for games in args.levels:
+            result = await run_level(host, port, games, args.plies, args.depth, args.time_limit)
+            results.append(result)
+            print(f"{result['games']:>6} games {result['moves']:>7} moves {result['seconds']:>9.2f}s "
+                  f"{result['moves_per_second']:>9.2f} moves/s  p50 {result['p50_ms']:>8.1f}ms  "
+                  f"p99 {result['p99_ms']:>8.1f}ms  busy {result['busy']}  errors {result['errors']}")
+    finally:
+        if server is not None:
+            await server.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure chess_server throughput and latency under concurrent games.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help=f"server to test (e.g. {DEFAULT_PORT}); starts one in-process if omitted")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 100, 1000], help="concurrent games per run")
+    parser.add_argument("--plies", type=int, default=10, help="moves played by each client per game")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=0.5, help="AI seconds per move")
+    parser.add_argument("--workers", type=int, help="engine processes of the in-process server")
+    parser.add_argument("--max-pending", type=int, help="queue limit of the in-process server")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
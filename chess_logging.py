@@ -0,0 +1,114 @@
+import logging
+import os
+
+# Every logger in the project lives under the "chess" namespace, one child per
+# subsystem, so each can be turned on independently.
+ROOT_LOGGER_NAME = "chess"
+SUBSYSTEMS = ("engine", "ai", "gui", "server")
+
+# Silent by default: without a handler here, library code would fall back to
+# logging.lastResort and print warnings to stderr.
+logging.getLogger(ROOT_LOGGER_NAME).addHandler(logging.NullHandler())
+
+# Handlers added by configure_logging, replaced on the next call
+_handlers = []
+
+
+def get_logger(subsystem):
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{subsystem}")
+
+
+class JsonLineFormatter(logging.Formatter):
+    """
+    Formats each record as a single JSON object per line.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Imported here, so that importing the engine does not load json
+        import json
+        self._dumps = json.dumps
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return self._dumps(entry)
+
+
+def configure_logging(levels=None, json_path=None, stream=True):
+    """
+    Enable logging for the given subsystems.
+    levels maps subsystem names (see SUBSYSTEMS) to level names or
+    numbers; other subsystems keep the default WARNING level. json_path, if
+    given, adds a JSON-line file sink. Calling it again replaces the handlers
+    of the previous call.
+    """
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+
+    for subsystem, level in (levels or {}).items():
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+            if not isinstance(level, int):
+                raise ValueError(f"Unknown log level for {subsystem}: {levels[subsystem]}")
+        get_logger(subsystem).setLevel(level)
+
+    handlers = []
+    if stream:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        handlers.append(handler)
+    if json_path:
+        handler = logging.FileHandler(json_path, encoding="utf-8")
+        handler.setFormatter(JsonLineFormatter())
+        handlers.append(handler)
+
+    # The "chess" logger's own level is left alone: it would become the level
+    # of every subsystem not configured here. Records passed up from the
+    # subsystems reach these handlers whatever that level is.
+    for handler in handlers:
+        root.addHandler(handler)
+    _handlers.extend(handlers)
+    return handlers
+
+
+def parse_levels(spec):
+    """
+    Parse a spec like "engine=debug,gui=info" into a {subsystem: level} dict.
+    A bare level ("debug") applies to every subsystem.
+    """
+    levels = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            subsystem, level = item.split("=", 1)
+            levels[subsystem.strip()] = level.strip()
+        else:
+            for subsystem in SUBSYSTEMS:
+                levels[subsystem] = item
+    return levels
+
+
+def configure_from_env(environ=None):
+    """
+    Configure logging from CHESS_LOG (level spec, see parse_levels) and
+    CHESS_LOG_JSON (path of the JSON-line sink). Does nothing if neither is set.
+    """
+    environ = os.environ if environ is None else environ
+    spec = environ.get("CHESS_LOG", "")
+    json_path = environ.get("CHESS_LOG_JSON")
+    if not spec and not json_path:
+        return []
+
+    levels = parse_levels(spec) if spec else {subsystem: "DEBUG" for subsystem in SUBSYSTEMS}
+    return configure_logging(levels, json_path=json_path, stream=bool(spec))
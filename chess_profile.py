@@ -0,0 +1,197 @@
+import atexit
+import functools
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from chess_logging import get_logger
+
+logger = get_logger("ai")
+
+# Methods timed while profiling, mapped to the search phase they belong to.
+# Any class passed to SearchProfiler.instrument() has these patched if present.
+PHASES = {
+    "get_possible_moves": "movegen",
+    "generate_valid_moves": "legality",
+    "make_move": "make_undo",
+    "undo_move": "make_undo",
+    "copy": "make_undo",
+    "evaluate_board": "evaluation",
+    "check_game_end": "end_detection",
+}
+
+# Opt-in phases. Attack tests are the innermost call of the search, so timing
+# them slows it down a lot and shifts the wrapper cost onto their callers.
+EXTRA_PHASES = {
+    "is_square_attacked": "attacks",
+}
+
+DEFAULT_OUTPUT = "chess_profile.collapsed"
+
+
+class SearchProfiler:
+    """
+    Records exclusive time per call stack of search phases.
+    Methods are only wrapped while instrument() is active, so a profiler that
+    is not in use costs nothing.
+    """
+    def __init__(self, root="search", extra_phases=None):
+        self.root = root
+        self.phases = dict(PHASES, **(extra_phases or {}))
+        self.samples = defaultdict(int)  # collapsed stack -> nanoseconds
+        self.calls = defaultdict(int)    # phase -> number of calls
+        self._keys = [root]
+        self._mark = None
+
+    def _charge(self):
+        now = time.perf_counter_ns()
+        self.samples[self._keys[-1]] += now - self._mark
+        self._mark = now
+
+    def _enter(self, phase):
+        self._charge()
+        self._keys.append(self._keys[-1] + ";" + phase)
+        self.calls[phase] += 1
+
+    def _leave(self):
+        self._charge()
+        self._keys.pop()
+
+    def _wrap(self, func, phase):
+        enter, leave = self._enter, self._leave
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            enter(phase)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                leave()
+        return wrapper
+
+    @contextmanager
+    def instrument(self, *classes):
+        """
+        Time the phase methods of the given classes for the duration of the block.
+        """
+        originals = []
+        for cls in classes:
+            for name, phase in self.phases.items():
+                func = cls.__dict__.get(name)
+                if func is not None:
+                    originals.append((cls, name, func))
+                    setattr(cls, name, self._wrap(func, phase))
+
+        self._mark = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            self._charge()
+            for cls, name, func in originals:
+                setattr(cls, name, func)
+
+    def reset(self):
+        self.samples.clear()
+        self.calls.clear()
+
+    def phase_totals(self):
+        """
+        Returns exclusive nanoseconds per phase (the last frame of each stack).
+        """
+        totals = defaultdict(int)
+        for stack, elapsed in self.samples.items():
+            totals[stack.rsplit(";", 1)[-1]] += elapsed
+        return dict(totals)
+
+    def collapsed(self):
+        """
+        Returns the samples in collapsed-stack format ("a;b;c <microseconds>"),
+        as consumed by flamegraph.pl and speedscope.
+        """
+        lines = []
+        for stack, elapsed in sorted(self.samples.items()):
+            micros = elapsed // 1000
+            if micros > 0:
+                lines.append(f"{stack} {micros}")
+        return "\n".join(lines) + "\n"
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+    def report(self):
+        totals = self.phase_totals()
+        grand_total = sum(totals.values()) or 1
+        lines = [f"{'phase':<15}{'calls':>10}{'ms':>12}{'%':>8}"]
+        for phase, elapsed in sorted(totals.items(), key=lambda item: -item[1]):
+            lines.append(f"{phase:<15}{self.calls.get(phase, 0):>10}"
+                         f"{elapsed / 1e6:>12.1f}{100 * elapsed / grand_total:>8.1f}")
+        return "\n".join(lines)
+
+
+_env_profiler = None
+
+
+def profiler_from_env(environ=None):
+    """
+    Returns the process-wide profiler if CHESS_PROFILE is set, else None.
+    CHESS_PROFILE is either "1" or the path the collapsed stacks are written
+    to when the process exits.
+    """
+    global _env_profiler
+    environ = os.environ if environ is None else environ
+    value = environ.get("CHESS_PROFILE", "")
+    if value in ("", "0"):
+        return None
+
+    if _env_profiler is None:
+        _env_profiler = SearchProfiler()
+        output = DEFAULT_OUTPUT if value == "1" else value
+        atexit.register(_write_env_profile, _env_profiler, output)
+    return _env_profiler
+
+
+def _write_env_profile(profiler, path):
+    if not profiler.samples:
+        return
+    profiler.write_collapsed(path)
+    logger.info("Wrote search profile to %s\n%s", path, profiler.report())
+
+
+def main(argv=None):
+    # Imported here so that importing the profiler stays cheap for the engine
+    import argparse
+    from Chess import ChessGame, ChessAI, Color
+
+    parser = argparse.ArgumentParser(description="Profile ChessAI search from the starting position.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--moves", type=int, default=4, help="number of plies of self-play to search")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="collapsed-stack output file")
+    parser.add_argument("--attacks", action="store_true",
+                        help="also time attack tests (much slower, and inflates their callers)")
+    args = parser.parse_args(argv)
+
+    profiler = SearchProfiler(extra_phases=EXTRA_PHASES if args.attacks else None)
+    game = ChessGame()
+    players = {
+        Color.WHITE: ChessAI(Color.WHITE, depth=args.depth, profile=profiler),
+        Color.BLACK: ChessAI(Color.BLACK, depth=args.depth, profile=profiler),
+    }
+    for _ in range(args.moves):
+        if game.game_over:
+            break
+        move = players[game.current_player].get_best_move(game)
+        if move is None:
+            break
+        game.make_move(*move)
+
+    profiler.write_collapsed(args.output)
+    print(profiler.report())
+    print(f"Collapsed stacks written to {args.output}")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so Chess and this script share one SearchProfiler class
+    import chess_profile
+    chess_profile.main()
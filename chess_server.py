@@ -0,0 +1,313 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Chess import ChessGame, ChessAI, Color
+from chess_logging import configure_from_env, get_logger
+
+logger = get_logger("server")
+
+# Protocol: one JSON object per line in each direction. Requests carry an "op":
+#   {"op": "new", "ai_color": "BLACK", "depth": 3, "time_limit": 1.0, "fen": "..."}
+#   {"op": "move", "game": 1, "move": "e2e4"}    -> the AI's reply is in "reply"
+#   {"op": "state", "game": 1}
+#   {"op": "close", "game": 1}
+#   {"op": "stats"}
+# Every response has "ok"; failed requests have "error" instead. A "busy" error
+# means the engine queue is full and the request was not applied; retry later.
+
+DEFAULT_PORT = 8765
+DEFAULT_TIME_LIMIT = 1.0
+MAX_DEPTH = 6
+
+# Engines are reused across requests within a worker process
+_engines = {}
+
+
+def format_move(game, move):
+    from_pos, to_pos = move
+    return game.coords_to_algebraic(from_pos) + game.coords_to_algebraic(to_pos)
+
+
+def search_move(fen, moves, color_name, depth, deadline):
+    """
+    Runs in a pool worker: rebuilds the game from a FEN and the moves played
+    since (enough to detect repetitions), then searches until the given wall-clock deadline (time.time()).
+    Returns (move, nodes) with move in coordinate notation, or None.
+    """
+    game = ChessGame.from_fen(fen)
+    for text in moves:
+        game.make_move(*game.parse_move(text), skip_validation=True)
+
+    key = (color_name, depth)
+    ai = _engines.get(key)
+    if ai is None:
+        ai = _engines[key] = ChessAI(Color[color_name], depth=depth)
+    # Time spent waiting in the queue counts against the budget
+    ai.time_limit = max(deadline - time.time(), 0.0)
+
+    move = ai.get_best_move(game)
+    return (None if move is None else format_move(game, move)), ai.nodes
+
+
+class GameSession:
+    def __init__(self, game_id, fen, ai_color, depth, time_limit):
+        self.game_id = game_id
+        self.ai_color = ai_color
+        self.depth = depth
+        self.time_limit = time_limit
+        self.game = ChessGame.from_fen(fen)
+        self.moves = []
+        self.lock = asyncio.Lock()
+
+        # What a worker needs to rebuild the position: the FEN after the last
+        # capture or pawn move and the moves since, which may still repeat
+        self.base_fen = fen
+        self.recent_moves = []
+
+    def state(self):
+        return {
+            "ok": True,
+            "game": self.game_id,
+            "fen": self.game.to_fen(),
+            "moves": self.moves,
+            "to_move": self.game.current_player.name,
+            "game_over": self.game.game_over,
+            "winner": self.game.winner.name if self.game.winner else None,
+        }
+
+    def play(self, text):
+        self.game.make_move(*self.game.parse_move(text))
+        self.moves.append(text)
+        if self.game.halfmove_clock == 0:
+            self.base_fen = self.game.to_fen()
+            self.recent_moves = []
+        else:
+            self.recent_moves.append(text)
+
+
+class RequestError(Exception):
+    pass
+
+
+class ChessServer:
+    """
+    Serves many concurrent games over TCP. Games live in the event loop; AI
+    searches run in a shared process pool, one per worker at a time, with the
+    rest waiting in first-come order. At most max_pending searches may be
+    waiting or running at once, beyond that requests are refused as busy.
+    """
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=None, max_pending=None,
+                 time_limit=DEFAULT_TIME_LIMIT, grace=1.0):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 64 * self.workers
+        self.time_limit = time_limit
+        self.grace = grace
+
+        self.sessions = {}
+        self.pending = 0
+        self.searches = 0
+        self.rejected = 0
+        self._ids = itertools.count(1)
+        self._executor = None
+        self._server = None
+        self._slots = None
+        self._connections = {}
+
+    async def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        # Searches only go to the pool when a worker is free, so their time budget is all search time
+        self._slots = asyncio.Semaphore(self.workers)
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Listening on %s:%d with %d workers", self.host, self.port, self.workers)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Disconnect clients still connected, so their handlers finish
+            for writer in self._connections.values():
+                writer.close()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=self.grace)
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def handle_client(self, reader, writer):
+        # Games are owned by the connection that created them
+        owned = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("request must be a JSON object")
+                    response = await self.dispatch(request, owned)
+                except (ValueError, TypeError, KeyError, RequestError) as e:
+                    response = {"ok": False, "error": str(e)}
+                # Echo a client-chosen id so responses can be matched to requests
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                # Slow readers hold up their own connection, not the server
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self.sessions.pop(game_id, None)
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def dispatch(self, request, owned):
+        op = request.get("op")
+        if op == "new":
+            return await self.new_game(request, owned)
+        if op == "stats":
+            return {"ok": True, "games": len(self.sessions), "pending": self.pending,
+                    "searches": self.searches, "rejected": self.rejected}
+
+        session = self.sessions.get(request.get("game"))
+        if session is None:
+            raise RequestError("unknown game")
+        if op == "move":
+            return await self.player_move(session, request["move"])
+        if op == "state":
+            return session.state()
+        if op == "close":
+            del self.sessions[session.game_id]
+            owned.discard(session.game_id)
+            return {"ok": True}
+        raise RequestError(f"unknown op: {op}")
+
+    async def new_game(self, request, owned):
+        fen = request.get("fen") or ChessGame().to_fen()
+        ai_color = Color[request.get("ai_color", "BLACK").upper()]
+        depth = min(int(request.get("depth", 3)), MAX_DEPTH)
+        time_limit = min(float(request.get("time_limit", self.time_limit)), self.time_limit)
+
+        session = GameSession(next(self._ids), fen, ai_color, depth, time_limit)
+        ai_to_move = session.game.current_player == ai_color and not session.game.game_over
+        if ai_to_move and self.pending >= self.max_pending:
+            self.rejected += 1
+            return {"ok": False, "error": "busy"}
+        self.sessions[session.game_id] = session
+        owned.add(session.game_id)
+
+        response = session.state()
+        if ai_to_move:
+            async with session.lock:
+                response["reply"] = await self.ai_move(session)
+            response.update(session.state())
+        return response
+
+    async def player_move(self, session, text):
+        async with session.lock:
+            game = session.game
+            if game.game_over:
+                raise RequestError("game is over")
+            if game.current_player == session.ai_color:
+                raise RequestError("not your turn")
+            move = game.parse_move(text)
+            if move is None or not game.is_valid_move(*move):
+                raise RequestError(f"illegal move: {text}")
+            # Refuse before changing anything, so a busy request can simply be retried
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return {"ok": False, "error": "busy"}
+
+            session.play(text)
+            reply = None
+            if not game.game_over:
+                reply = await self.ai_move(session)
+
+            response = session.state()
+            response["reply"] = reply
+            return response
+
+    def _release_slot(self, loop):
+        # Called from the executor's thread once a search finishes
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            pass  # The event loop is closed, nothing waits for the slot
+
+    async def ai_move(self, session):
+        """
+        Searches the AI's move in the pool and plays it. The time limit starts
+        when a worker is free; if the worker does not answer within it plus a
+        grace period, the first legal move is played instead, and the worker
+        stays reserved until its search ends.
+        """
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            await self._slots.acquire()
+            deadline = time.time() + session.time_limit
+            try:
+                future = self._executor.submit(search_move, session.base_fen, list(session.recent_moves),
+                                               session.ai_color.name, session.depth, deadline)
+            except BaseException:
+                self._slots.release()
+                raise
+            # The slot is freed when the worker is done, not when we stop waiting:
+            # a worker that overran keeps searching and must not be handed the next search
+            future.add_done_callback(lambda _: self._release_slot(loop))
+            try:
+                text, nodes = await asyncio.wait_for(asyncio.wrap_future(future), session.time_limit + self.grace)
+            except asyncio.TimeoutError:
+                logger.warning("Game %d: search missed its deadline", session.game_id)
+                moves = session.game.get_all_valid_moves(session.ai_color)
+                text, nodes = format_move(session.game, moves[0]), 0
+        finally:
+            self.pending -= 1
+        self.searches += 1
+        logger.debug("Game %d: %s (%d nodes, %.3fs)", session.game_id, text, nodes, time.perf_counter() - start)
+
+        if text is not None:
+            session.play(text)
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve concurrent chess games against the AI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, help="engine processes (defaults to the CPU count)")
+    parser.add_argument("--max-pending", type=int, help="queued searches before refusing moves (default 64 per worker)")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="maximum seconds per AI move")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+    server = ChessServer(args.host, args.port, workers=args.workers, max_pending=args.max_pending,
+                         time_limit=args.time_limit)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+from Chess import ChessAI, Color, FEN_PIECES, PieceType
+from chess_logging import get_logger
+
+logger = get_logger("ai")
+
+# Piece types in code order (code 1 = pawn ... 6 = king)
+PIECE_TYPES = [PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+               PieceType.ROOK, PieceType.QUEEN, PieceType.KING]
+
+# Weight vector layout: 6 piece-square tables of 64 squares, then 6 material values
+MATERIAL_OFFSET = 6 * 64
+NUM_WEIGHTS = MATERIAL_OFFSET + 6
+
+RESULTS = {
+    "1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5,
+    "1.0": 1.0, "0.0": 0.0, "0.5": 0.5,
+    "1": 1.0, "0": 0.0,
+}
+
+# The result is an EPD c9 operation, or all that follows the FEN fields,
+# optionally quoted or bracketed
+C9_PATTERN = re.compile(r'(?:^|[\s;])c9\s+"?(1-0|0-1|1/2-1/2)"?')
+RESULT_PATTERN = re.compile(r'[;\s]*[\["]?(1-0|0-1|1/2-1/2|1\.0|0\.0|0\.5|1|0)[\]"]?\s*;?\s*')
+
+FEN_CODES = {char: piece.code for char, piece in FEN_PIECES.items()}
+
+
+def parse_placement(placement, out):
+    """
+    Writes the piece codes of a FEN placement field into out (64 int8 entries).
+    """
+    square = 0
+    for char in placement:
+        if char == "/":
+            continue
+        if char.isdigit():
+            square += int(char)
+        else:
+            out[square] = FEN_CODES[char]
+            square += 1
+    if square != 64:
+        raise ValueError(f"Invalid FEN placement: {placement!r}")
+
+
+def parse_result(line):
+    """
+    Returns the result label of a FEN or EPD line, or None if it has none.
+    The two numeric fields after the first four are taken as the FEN move
+    counters, so "... w KQkq - 0 1" alone is not read as a White win.
+    """
+    match = C9_PATTERN.search(line)
+    if match is not None:
+        return RESULTS[match.group(1)]
+
+    fields = line.split()
+    counters = fields[4:6]
+    skip = 6 if len(counters) == 2 and all(field.rstrip(";").isdigit() for field in counters) else 4
+    match = RESULT_PATTERN.fullmatch(" ".join(fields[skip:]))
+    return None if match is None else RESULTS[match.group(1)]
+
+
+def load_positions(path):
+    """
+    Loads labeled positions, one per line: a FEN (or EPD) followed by the game
+    result from White's point of view, e.g.
+        rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1; 1/2-1/2
+        <epd> c9 "1-0";
+    Lines without a result (see parse_result) are skipped with a warning.
+    Returns (boards, results): an (N, 64) int8 array of piece codes and an (N,)
+    float32 array of results (1 white win, 0.5 draw, 0 black win).
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    boards = np.zeros((len(lines), 64), dtype=np.int8)
+    results = np.empty(len(lines), dtype=np.float32)
+    count = 0
+    for line in lines:
+        result = parse_result(line)
+        if result is None:
+            logger.warning("Skipping line without a result: %s", line)
+            continue
+        try:
+            parse_placement(line.split()[0], boards[count])
+        except (KeyError, ValueError):
+            boards[count] = 0
+            logger.warning("Skipping line with an invalid FEN: %s", line)
+            continue
+        results[count] = result
+        count += 1
+
+    return boards[:count], results[:count]
+
+
+def extract_features(boards):
+    """
+    Extracts the features of every board, once.
+    Returns (position, square_feature, sign, material): one entry per piece for
+    the board it is on, its index into the piece-square part of the weight
+    vector and +1/-1 for white/black, plus an (N, 6) float32 array of net piece
+    counts (white minus black) per piece type for the material weights.
+    Black pieces use the mirrored square, like ChessAI's tables.
+    """
+    position, square = np.nonzero(boards)
+    codes = boards[position, square].astype(np.int16)
+    sign = np.sign(codes).astype(np.float32)
+    piece_index = np.abs(codes) - 1
+
+    row, col = np.divmod(square, 8)
+    relative_row = np.where(codes > 0, row, 7 - row)
+    square_feature = piece_index * 64 + relative_row * 8 + col
+
+    material = np.zeros((len(boards), 6), dtype=np.float32)
+    np.add.at(material, (position, piece_index), sign)
+
+    return position.astype(np.int32), square_feature.astype(np.int16), sign, material
+
+
+def weights_from_ai(ai):
+    """
+    Returns the weight vector of a ChessAI's current (white-relative) tables.
+    """
+    weights = np.zeros(NUM_WEIGHTS)
+    for index, piece_type in enumerate(PIECE_TYPES):
+        table = getattr(ai, ChessAI.TABLE_ATTRIBUTES[piece_type])
+        weights[index * 64:(index + 1) * 64] = np.array(table, dtype=np.float64).ravel()
+        weights[MATERIAL_OFFSET + index] = ai.piece_values[piece_type]
+    return weights
+
+
+def weights_to_dict(weights):
+    """
+    Converts a weight vector to the format read by ChessAI.load_weights.
+    """
+    weights = np.rint(weights).astype(int)
+    return {
+        "piece_values": {piece_type.name: int(weights[MATERIAL_OFFSET + index])
+                         for index, piece_type in enumerate(PIECE_TYPES)},
+        "tables": {piece_type.name: weights[index * 64:(index + 1) * 64].reshape(8, 8).tolist()
+                   for index, piece_type in enumerate(PIECE_TYPES)},
+    }
+
+
+class TexelTuner:
+    """
+    Fits material and piece-square weights to game results by minimizing the
+    mean squared error between the result and sigmoid(k * eval), using full-batch
+    Adam steps over the pre-extracted features. Only the static (material and
+    positional) part of ChessAI's evaluation is tuned.
+    """
+    def __init__(self, boards, results, weights):
+        self.results = results.astype(np.float64)
+        self.num_positions = len(results)
+        self.position, self.square_feature, self.sign, self.material = extract_features(boards)
+        self.weights = np.asarray(weights, dtype=np.float64).copy()
+        self.k = 1.0
+
+        # The kings always cancel out, so their material value cannot be fitted
+        self.frozen = np.zeros(NUM_WEIGHTS, dtype=bool)
+        self.frozen[MATERIAL_OFFSET + PIECE_TYPES.index(PieceType.KING)] = True
+
+    def evaluate(self, weights=None):
+        """
+        Returns the static evaluation of every position from White's point of view.
+        """
+        weights = self.weights if weights is None else weights
+        contributions = self.sign * weights[self.square_feature]
+        positional = np.bincount(self.position, weights=contributions, minlength=self.num_positions)
+        return positional + self.material @ weights[MATERIAL_OFFSET:]
+
+    def predict(self, scores, k=None):
+        k = self.k if k is None else k
+        return 1.0 / (1.0 + np.power(10.0, -k * scores / 400.0))
+
+    def error(self, weights=None, k=None):
+        return float(np.mean((self.results - self.predict(self.evaluate(weights), k)) ** 2))
+
+    def fit_k(self, low=0.1, high=3.0, iterations=30):
+        """
+        Finds the sigmoid scale that best fits the current weights (golden-section search).
+        """
+        scores = self.evaluate()
+        ratio = (5 ** 0.5 - 1) / 2
+        for _ in range(iterations):
+            a = high - ratio * (high - low)
+            b = low + ratio * (high - low)
+            error_a = np.mean((self.results - self.predict(scores, a)) ** 2)
+            error_b = np.mean((self.results - self.predict(scores, b)) ** 2)
+            if error_a < error_b:
+                high = b
+            else:
+                low = a
+        self.k = (low + high) / 2
+        return self.k
+
+    def gradient(self):
+        scores = self.evaluate()
+        predictions = self.predict(scores)
+        # d(error)/d(score) for each position
+        slope = (-2.0 * (self.results - predictions) * predictions * (1.0 - predictions)
+                 * self.k * np.log(10.0) / 400.0 / self.num_positions)
+        contributions = self.sign * slope[self.position]
+        gradient = np.bincount(self.square_feature, weights=contributions, minlength=NUM_WEIGHTS)
+        gradient[MATERIAL_OFFSET:] = self.material.T @ slope
+        gradient[self.frozen] = 0.0
+        return gradient
+
+    def tune(self, steps=500, learning_rate=1.0, beta1=0.9, beta2=0.999, epsilon=1e-8, report_every=50):
+        """
+        Runs Adam steps on the weights. Returns the final mean squared error.
+        """
+        m = np.zeros(NUM_WEIGHTS)
+        v = np.zeros(NUM_WEIGHTS)
+        for step in range(1, steps + 1):
+            gradient = self.gradient()
+            m = beta1 * m + (1 - beta1) * gradient
+            v = beta2 * v + (1 - beta2) * gradient ** 2
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            self.weights -= learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+            if report_every and step % report_every == 0:
+                logger.info("step %d: error %.6f", step, self.error())
+        return self.error()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune ChessAI evaluation weights on labeled positions.")
+    parser.add_argument("positions", help="file with one 'FEN result' per line")
+    parser.add_argument("--output", default="weights.json", help="weights file for ChessAI(weights=...)")
+    parser.add_argument("--initial", help="weights file to start from (defaults to ChessAI's built-in tables)")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    parser.add_argument("--k", type=float, help="sigmoid scale (fitted to the initial weights if omitted)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    boards, results = load_positions(args.positions)
+    print(f"Loaded {len(results)} positions in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    tuner = TexelTuner(boards, results, weights_from_ai(ChessAI(Color.WHITE, weights=args.initial)))
+    print(f"Extracted {len(tuner.position)} features in {time.perf_counter() - start:.1f}s")
+
+    tuner.k = args.k if args.k is not None else tuner.fit_k()
+    initial_error = tuner.error()
+    start = time.perf_counter()
+    final_error = tuner.tune(steps=args.steps, learning_rate=args.learning_rate)
+    print(f"k={tuner.k:.3f} error {initial_error:.6f} -> {final_error:.6f} "
+          f"in {time.perf_counter() - start:.1f}s ({args.steps} steps)")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(weights_to_dict(tuner.weights), f, indent=1)
+    print(f"Weights written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
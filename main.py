@@ -1,7 +1,20 @@
+import argparse
 from Chess import ChessGame
 from chess_gui import ChessGUI
+from chess_logging import configure_from_env
+from chess_profile import SearchProfiler
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play chess against the AI.")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="profile the AI search and write collapsed stacks to PATH on exit")
+    args = parser.parse_args()
+    
+    configure_from_env()
+    profiler = SearchProfiler() if args.profile else None
     game = ChessGame()
-    gui = ChessGUI(game)
-    gui.run()
\ No newline at end of file
+    gui = ChessGUI(game, profile=profiler)
+    gui.run()
+    
+    if profiler is not None:
+        profiler.write_collapsed(args.profile)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import logging
+import unittest
+
+from Chess import ChessGame, ChessAI, Color
+from chess_logging import ROOT_LOGGER_NAME, SUBSYSTEMS, configure_from_env, configure_logging, get_logger
+
+try:
+    from chess_tune import parse_result
+except ImportError:  # chess_tune requires NumPy
+    parse_result = None
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+POSITION_3 = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+
+
+def perft(game, depth):
+    """
+    Counts the leaf nodes of the legal move tree, playing and taking back each move.
+    """
+    if depth == 0:
+        return 1
+    nodes = 0
+    for from_pos, to_pos in game.get_all_valid_moves(game.current_player):
+        game.make_move(from_pos, to_pos, skip_validation=True)
+        nodes += perft(game, depth - 1)
+        game.undo_move()
+    return nodes
+
+
+class PerftTest(unittest.TestCase):
+    # Reference counts from https://www.chessprogramming.org/Perft_Results
+
+    def test_start_position(self):
+        self.assertEqual(perft(ChessGame(), 3), 8902)
+
+    def test_kiwipete(self):
+        self.assertEqual(perft(ChessGame.from_fen(KIWIPETE), 2), 2039)
+
+    def test_position_3(self):
+        self.assertEqual(perft(ChessGame.from_fen(POSITION_3), 3), 2812)
+
+    def test_undo_restores_hash(self):
+        game = ChessGame.from_fen(KIWIPETE)
+        key = game.hash
+        perft(game, 2)
+        self.assertEqual(game.hash, key)
+        self.assertEqual(game.hash, game.compute_hash())
+
+
+class SearchTest(unittest.TestCase):
+
+    def test_depth_4_with_null_move(self):
+        # Null-move pruning first applies at depth 4: the position after a null
+        # move is not in position_counts and must not break repetition checks
+        game = ChessGame()
+        move = ChessAI(Color.WHITE, depth=4, profile=False).get_best_move(game)
+        self.assertIn(move, game.get_all_valid_moves(Color.WHITE))
+        self.assertEqual(game.hash, game.compute_hash())
+
+    def test_repetition(self):
+        game = ChessGame()
+        for _ in range(2):
+            for move in (((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))):
+                self.assertFalse(game.game_over)
+                game.make_move(*move)
+        self.assertTrue(game.is_threefold_repetition())
+        self.assertTrue(game.game_over)
+        self.assertIsNone(game.winner)
+
+    def test_repetition_ignores_uncapturable_en_passant(self):
+        # After e2e4 no black pawn can take en passant, so the position after
+        # it repeats on the next two returns of the knights
+        game = ChessGame()
+        game.make_move(*game.parse_move("e2e4"))
+        for _ in range(2):
+            for text in ("g8f6", "g1f3", "f6g8", "f3g1"):
+                self.assertFalse(game.game_over)
+                game.make_move(*game.parse_move(text))
+        self.assertTrue(game.is_threefold_repetition())
+        self.assertTrue(game.game_over)
+        self.assertIsNone(game.winner)
+
+    def test_capturable_en_passant_is_hashed(self):
+        game = ChessGame.from_fen("4k3/8/8/8/5p2/8/4P3/4K3 w - - 0 1")
+        game.make_move(*game.parse_move("e2e4"))
+        without_target = ChessGame.from_fen("4k3/8/8/8/4Pp2/8/8/4K3 b - - 0 1")
+        self.assertNotEqual(game.hash, without_target.hash)
+        self.assertEqual(game.hash, game.compute_hash())
+
+
+class LoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(self.reset_logging)
+
+    @staticmethod
+    def reset_logging():
+        configure_logging(stream=False)
+        for subsystem in SUBSYSTEMS:
+            get_logger(subsystem).setLevel(logging.NOTSET)
+
+    def test_only_configured_subsystems_are_enabled(self):
+        configure_from_env({"CHESS_LOG": "engine=debug"})
+        self.assertTrue(get_logger("engine").isEnabledFor(logging.DEBUG))
+        self.assertEqual(get_logger("ai").getEffectiveLevel(), logging.WARNING)
+        self.assertFalse(get_logger("ai").isEnabledFor(logging.INFO))
+
+    def test_reconfiguring_replaces_handlers(self):
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        configure_from_env({"CHESS_LOG": "engine=debug"})
+        handlers = len(root.handlers)
+        configure_from_env({"CHESS_LOG": "engine=debug"})
+        self.assertEqual(len(root.handlers), handlers)
+
+
+@unittest.skipIf(parse_result is None, "NumPy is not installed")
+class ParseResultTest(unittest.TestCase):
+
+    def test_move_counters_are_not_a_result(self):
+        self.assertIsNone(parse_result(START_FEN))
+        self.assertIsNone(parse_result(START_FEN.replace(" 0 1", " 0 10")))
+
+    def test_result_after_move_counters(self):
+        self.assertEqual(parse_result(START_FEN + " 1-0"), 1.0)
+        self.assertEqual(parse_result(START_FEN + "; 0-1"), 0.0)
+        self.assertEqual(parse_result(START_FEN + " 0.5"), 0.5)
+
+    def test_result_after_epd_fields(self):
+        epd = START_FEN.rsplit(" ", 2)[0]
+        self.assertEqual(parse_result(epd + " 0"), 0.0)
+        self.assertEqual(parse_result(epd + ' c9 "1/2-1/2";'), 0.5)
+        self.assertEqual(parse_result(epd + ' bm e4; c9 "1-0";'), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()